@@ -0,0 +1,67 @@
+"""
+Benchmark: JSON decoding backends on 500 device extensive search pages
+
+Decodes recorded pages from a cassette (see pyws1uem.transport) or, without
+a cassette, synthetic 500 device pages with every installed backend.
+
+    python -m benchmarks.bench_decode --cassette session.ndjson
+"""
+
+import argparse
+import json
+import time
+
+from pyws1uem import decoding
+from benchmarks.bench_snapshot import synthetic_devices
+
+
+def recorded_pages(cassette):
+    with open(cassette, 'r', encoding='utf-8') as lines:
+        for line in lines:
+            interaction = json.loads(line)
+            if '/devices/extensivesearch' in interaction['key'] \
+                    and interaction.get('encoding') != 'base64':
+                yield interaction['content'].encode('utf-8')
+
+
+def synthetic_pages(pages, page_size=500):
+    devices = list(synthetic_devices(page_size))
+    for page in range(pages):
+        yield json.dumps({'Devices': devices, 'Page': page, 'PageSize': page_size,
+                          'Total': pages * page_size}).encode('utf-8')
+
+
+def run(pages, rounds):
+    total = sum(len(page) for page in pages)
+    print('{} pages, {:.1f} MB'.format(len(pages), total / 1e6))
+    for name in decoding.available_backends():
+        decoding.set_decoder(name)
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for page in pages:
+                decoding.decode_json(page)
+        elapsed = (time.perf_counter() - start) / rounds
+        print('{:8s}: {:7.4f}s per round, {:6.1f} MB/s'.format(
+            name, elapsed, total / elapsed / 1e6))
+    decoding.set_decoder('json')
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for page in pages:
+            json.loads(page.decode('utf-8'))
+    elapsed = (time.perf_counter() - start) / rounds
+    print('{:8s}: {:7.4f}s per round, {:6.1f} MB/s (text copy, previous behaviour)'.format(
+        'json+str', elapsed, total / elapsed / 1e6))
+    decoding.set_decoder()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--cassette', help='Cassette with recorded extensive search pages')
+    parser.add_argument('--pages', type=int, default=20)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+    if args.cassette:
+        page_list = list(recorded_pages(args.cassette))
+    else:
+        page_list = list(synthetic_pages(args.pages))
+    run(page_list, args.rounds)
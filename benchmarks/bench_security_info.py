@@ -0,0 +1,71 @@
+"""
+Benchmark: streaming security samples vs. one call per device
+
+Runs against a simulated tenant with a fixed latency per request,
+so no live environment is needed.
+
+    python -m benchmarks.bench_security_info --devices 5000 --latency 0.02
+"""
+
+import argparse
+import time
+
+from pyws1uem.mdm.devices import Devices
+
+
+class SimulatedClient(object):
+    """Answers the security endpoints of a fake fleet after a fixed delay."""
+
+    def __init__(self, devices, latency):
+        self.devices = devices
+        self.latency = latency
+        self.calls = 0
+
+    def get(self, module, path, version=None, params=None, header=None, raw=False,
+            timeout=30):
+        self.calls += 1
+        time.sleep(self.latency)
+        if path == '/devices/securityinfosearch':
+            if params.get('user') == 'nobody':
+                return {'SecurityInfo': [], 'Page': 0, 'PageSize': 0, 'Total': 0}
+            page, size = int(params['page']), int(params['pagesize'])
+            ids = range(page * size, min((page + 1) * size, self.devices))
+            return {'SecurityInfo': [self._sample(i) for i in ids],
+                    'Page': page, 'PageSize': size, 'Total': self.devices}
+        return self._sample(int(path.split('/')[2]))
+
+    @staticmethod
+    def _sample(device_id):
+        return {'Id': {'Value': device_id}, 'IsCompromised': False,
+                'DataProtectionEnabled': True, 'BlockLevelEncryption': True}
+
+
+def run(devices, latency, workers):
+    client = SimulatedClient(devices, latency)
+    start = time.perf_counter()
+    count = sum(1 for _ in Devices(client).iter_security_info())
+    print('stream      : {:6d} records {:4d} calls {:7.2f}s'.format(
+        count, client.calls, time.perf_counter() - start))
+
+    client = SimulatedClient(devices, latency)
+    start = time.perf_counter()
+    count = sum(1 for _ in map(Devices(client).get_security_info_by_id, range(devices)))
+    print('per device  : {:6d} records {:4d} calls {:7.2f}s'.format(
+        count, client.calls, time.perf_counter() - start))
+
+    # Search matches nothing, so every device is fetched by the worker pool
+    client = SimulatedClient(devices, latency)
+    start = time.perf_counter()
+    count = sum(1 for _ in Devices(client).iter_security_info(
+        device_ids=range(devices), fetch_missing=True, max_workers=workers,
+        user='nobody'))
+    print('fan out x{:<2d}: {:6d} records {:4d} calls {:7.2f}s'.format(
+        workers, count, client.calls, time.perf_counter() - start))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--devices', type=int, default=2000)
+    parser.add_argument('--latency', type=float, default=0.01)
+    parser.add_argument('--workers', type=int, default=16)
+    args = parser.parse_args()
+    run(args.devices, args.latency, args.workers)
@@ -0,0 +1,78 @@
+"""
+Benchmark: loading a device inventory from JSON vs. a memory mapped snapshot
+
+Generates a synthetic extensive_search inventory, writes it as JSON and as
+snapshot and compares the time to open it and to look up random devices.
+
+    python -m benchmarks.bench_snapshot --devices 100000
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from pyws1uem.mdm.snapshot import Snapshot, write_snapshot
+
+PLATFORMS = ('Apple', 'Android', 'WinRT', 'AppleOsX')
+
+
+def synthetic_devices(count):
+    for device_id in range(1, count + 1):
+        yield {
+            'DeviceId': device_id,
+            'Udid': '{:032x}'.format(device_id * 7919),
+            'SerialNumber': 'SN{:010d}'.format(device_id),
+            'MacAddress': '{:012x}'.format(device_id),
+            'DeviceFriendlyName': 'device-{}'.format(device_id),
+            'OrganizationGroupId': device_id % 50,
+            'OrganizationGroupName': 'OG {}'.format(device_id % 50),
+            'UserName': 'user{}'.format(device_id % 5000),
+            'Platform': PLATFORMS[device_id % len(PLATFORMS)],
+            'Model': 'Model {}'.format(device_id % 30),
+            'EnrollmentStatus': 'Enrolled',
+            'ComplianceStatus': 'Compliant',
+            'LastSeen': '2024-{:02d}-01T00:00:00'.format(device_id % 12 + 1),
+            'CustomAttributes': [{'Name': 'site', 'Value': str(device_id % 10)}],
+        }
+
+
+def run(devices, lookups):
+    folder = tempfile.mkdtemp()
+    json_path = os.path.join(folder, 'inventory.json')
+    snapshot_path = os.path.join(folder, 'inventory.snap')
+    with open(json_path, 'w', encoding='utf-8') as inventory:
+        json.dump(list(synthetic_devices(devices)), inventory)
+    start = time.perf_counter()
+    write_snapshot(snapshot_path, synthetic_devices(devices))
+    print('snapshot write   : {:7.3f}s'.format(time.perf_counter() - start))
+    print('size json/snap   : {:.1f} MB / {:.1f} MB'.format(
+        os.path.getsize(json_path) / 1e6, os.path.getsize(snapshot_path) / 1e6))
+    ids = [random.randint(1, devices) for _ in range(lookups)]
+
+    start = time.perf_counter()
+    with open(json_path, 'r', encoding='utf-8') as inventory:
+        by_id = {record['DeviceId']: record for record in json.load(inventory)}
+    loaded = time.perf_counter()
+    for device_id in ids:
+        by_id[device_id]
+    print('json load/lookups: {:7.3f}s / {:7.3f}s'.format(
+        loaded - start, time.perf_counter() - loaded))
+
+    start = time.perf_counter()
+    with Snapshot(snapshot_path) as snapshot:
+        loaded = time.perf_counter()
+        for device_id in ids:
+            snapshot.get_by_id(device_id)
+        print('snap open/lookups: {:7.3f}s / {:7.3f}s'.format(
+            loaded - start, time.perf_counter() - loaded))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--devices', type=int, default=100000)
+    parser.add_argument('--lookups', type=int, default=10000)
+    args = parser.parse_args()
+    run(args.devices, args.lookups)
@@ -0,0 +1,241 @@
+"""
+Bulk Module
+--
+Helpers to run many API calls concurrently with a bounded worker pool
+and an optional shared rate limit. Every call is isolated, so one failing
+device does not abort the rest of the batch; the outcome of each call is
+reported as a BulkResult.
+"""
+
+import threading
+import time
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from .error import RateLimitError
+
+
+class RateLimiter(object):
+    """
+    Thread safe token bucket limiting the number of calls per second.
+
+    Args:
+        rate (float): Allowed calls per second
+        burst (int, optional): Calls that may be made back to back before
+            throttling kicks in. Defaults to the rounded up rate.
+    """
+
+    def __init__(self, rate: float, burst: int = None):
+        if rate <= 0:
+            raise ValueError('rate must be greater than zero')
+        self.rate = float(rate)
+        self.burst = burst or max(1, int(rate + 0.999))
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a call may be made."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst,
+                                   self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_time = (1 - self._tokens) / self.rate
+            time.sleep(wait_time)
+
+
+class BulkResult(object):
+    """
+    Outcome of a single call made by run_bulk/iter_bulk
+
+    Attributes:
+        key: The item the call was made for (e.g. a device ID)
+        ok (bool): True if the call returned without raising
+        response: API response of the call, None on failure
+        error (Exception): Raised exception, None on success
+        elapsed (float): Seconds spent in the call
+    """
+    __slots__ = ('key', 'ok', 'response', 'error', 'elapsed')
+
+    def __init__(self, key, ok, response=None, error=None, elapsed=0.0):
+        self.key = key
+        self.ok = ok
+        self.response = response
+        self.error = error
+        self.elapsed = elapsed
+
+    def as_dict(self):
+        """Returns the result as a flat dict, e.g. for a CSV row."""
+        return {
+            'key': self.key,
+            'ok': self.ok,
+            'response': self.response,
+            'error': str(self.error) if self.error is not None else None,
+            'elapsed': round(self.elapsed, 4),
+        }
+
+    def __repr__(self):
+        state = 'ok' if self.ok else 'error={!s}'.format(self.error)
+        return 'BulkResult({!r}, {})'.format(self.key, state)
+
+
+def _call(func, key, rate_limiter, retries):
+    start = time.perf_counter()
+    attempt = 0
+    while True:
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        try:
+            response = func(key)
+        except RateLimitError as error:
+            if attempt >= retries:
+                return BulkResult(key, False, error=error,
+                                  elapsed=time.perf_counter() - start)
+            # Back off as asked by the API, exponentially otherwise
+            time.sleep(error.retry_after or min(2 ** attempt, 30))
+            attempt += 1
+            continue
+        except Exception as error:  # pylint: disable=broad-except
+            return BulkResult(key, False, error=error,
+                              elapsed=time.perf_counter() - start)
+        return BulkResult(key, True, response=response,
+                          elapsed=time.perf_counter() - start)
+
+
+def iter_bulk(func, keys, max_workers: int = 8, rate_limit: float = None,
+              retries: int = 3):
+    """
+    Calls func(key) for every key on a bounded thread pool and yields a
+    BulkResult per key as the calls complete.
+
+    At most 2 * max_workers calls are in flight, so keys may be a lazy
+    iterable of any size.
+
+    Args:
+        func (callable): Function taking a single key
+        keys (iterable): Keys to call func with
+        max_workers (int, optional): Number of worker threads. Defaults to 8.
+        rate_limit (float or RateLimiter, optional): Maximum calls per second
+            across all workers. Defaults to None (unlimited).
+        retries (int, optional): Retries of a call the API answered with
+            HTTP 429. Defaults to 3.
+
+    Yields:
+        BulkResult: Outcome of each call in completion order
+    """
+    if isinstance(rate_limit, RateLimiter) or rate_limit is None:
+        limiter = rate_limit
+    else:
+        limiter = RateLimiter(rate_limit)
+    keys = iter(keys)
+    max_pending = max(1, max_workers) * 2
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < max_pending:
+                try:
+                    key = next(keys)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.add(executor.submit(_call, func, key, limiter, retries))
+            if not pending:
+                return
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def run_bulk(func, keys, max_workers: int = 8, rate_limit: float = None,
+             retries: int = 3):
+    """
+    Calls func(key) for every key concurrently and returns the results
+    in the order of the given keys.
+
+    Args:
+        func (callable): Function taking a single key
+        keys (iterable): Keys to call func with
+        max_workers (int, optional): Number of worker threads. Defaults to 8.
+        rate_limit (float or RateLimiter, optional): Maximum calls per second.
+            Defaults to None (unlimited).
+        retries (int, optional): Retries of a call the API answered with
+            HTTP 429. Defaults to 3.
+
+    Returns:
+        list: BulkResult for each key
+    """
+    indexed = list(enumerate(keys))
+    results = [None] * len(indexed)
+
+    def _indexed_call(item):
+        return item[0], func(item[1])
+
+    for result in iter_bulk(_indexed_call, indexed, max_workers, rate_limit, retries):
+        index, key = result.key
+        if result.ok:
+            results[index] = BulkResult(key, True, response=result.response[1],
+                                        elapsed=result.elapsed)
+        else:
+            results[index] = BulkResult(key, False, error=result.error,
+                                        elapsed=result.elapsed)
+    return results
+
+
+def batched(values, batch_size: int):
+    """Yields lists of up to batch_size items of values (may be lazy)."""
+    values = iter(values)
+    while True:
+        batch = list(islice(values, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _faults(response):
+    if not isinstance(response, dict):
+        return {}
+    faults = (response.get('Faults') or {}).get('Fault') or []
+    return {str(fault.get('ItemValue')): fault for fault in faults}
+
+
+def iter_bulk_batches(func, keys, batch_size: int = 100, max_workers: int = 4,
+                      rate_limit: float = None, retries: int = 3):
+    """
+    Calls func(batch) for batches of keys concurrently, e.g. for endpoints
+    taking {"BulkValues": {"Value": [...]}}, and splits the bulk response
+    (AcceptedItems, FailedItems, Faults) of every batch into a BulkResult
+    per key. The fault of a key is its error.
+
+    Args:
+        func (callable): Function taking a list of keys
+        keys (iterable): Keys, may be lazy
+        batch_size (int, optional): Keys per call. Defaults to 100.
+        max_workers (int, optional): Concurrent calls. Defaults to 4.
+        rate_limit (float or RateLimiter, optional): Maximum calls per second.
+            Defaults to None (unlimited).
+        retries (int, optional): Retries of a call the API answered with
+            HTTP 429. Defaults to 3.
+
+    Yields:
+        BulkResult: Outcome per key as the batches complete
+    """
+    for batch in iter_bulk(func, batched(keys, batch_size), max_workers=max_workers,
+                           rate_limit=rate_limit, retries=retries):
+        faults = _faults(batch.response)
+        for key in batch.key:
+            if not batch.ok:
+                yield BulkResult(key, False, error=batch.error, elapsed=batch.elapsed)
+            elif str(key) in faults:
+                fault = faults[str(key)]
+                yield BulkResult(key, False, response=fault,
+                                 error=ValueError(fault.get('Message')),
+                                 elapsed=batch.elapsed)
+            else:
+                yield BulkResult(key, True, response=batch.response,
+                                 elapsed=batch.elapsed)
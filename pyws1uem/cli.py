@@ -0,0 +1,375 @@
+"""
+Command Line Module
+--
+The pyws1uem console script for exports and bulk actions:
+
+    pyws1uem export devices -o devices.csv --filter platform=Apple
+    pyws1uem export users -o users.ndjson
+    pyws1uem tags add 12 -i device_ids.txt --checkpoint tags.done
+    pyws1uem command LockDevice --serials -i - < serials.txt
+    pyws1uem inventory sync inventory.snap --root-og 570
+
+The credentials are read from the WS1_ENV, WS1_AUTH_URL, WS1_CLIENT_ID,
+WS1_CLIENT_SECRET and WS1_TENANT_CODE environment variables or the
+matching options. Inputs hold one device ID (or serial number) per line,
+empty lines and lines starting with # are ignored. Bulk results are
+written as NDJSON lines, progress and throughput go to stderr.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+from .bulk import BulkResult, iter_bulk
+from .client import WorkspaceOneAPI
+from .mdm.snapshot import write_snapshot
+from .paging import PagerSettings
+from .sinks import NDJSONSink, open_sink
+
+_CREDENTIALS = (
+    ('env', 'WS1_ENV', 'Base URL of the API, e.g. https://as1234.awmdm.com'),
+    ('auth_url', 'WS1_AUTH_URL', 'URL of the OAuth token service'),
+    ('client_id', 'WS1_CLIENT_ID', 'OAuth client ID'),
+    ('client_secret', 'WS1_CLIENT_SECRET', 'OAuth client secret'),
+    ('aw_tenant_code', 'WS1_TENANT_CODE', 'API key (aw-tenant-code)'),
+)
+
+
+def read_keys(sources):
+    """
+    Yields the stripped lines of the given files ('-' for stdin),
+    skipping empty lines and comments.
+    """
+    for source in sources:
+        lines = sys.stdin if source == '-' else open(source, 'r', encoding='utf-8')
+        try:
+            for line in lines:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    yield line
+        finally:
+            if lines is not sys.stdin:
+                lines.close()
+
+
+class Checkpoint(object):
+    """
+    File of the keys that were processed successfully, one per line.
+    A rerun with the same checkpoint skips these keys.
+
+    Args:
+        path (str, optional): Checkpoint file. Defaults to None (disabled).
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.done = set()
+        self._file = None
+        if path:
+            if os.path.exists(path):
+                self.done = set(read_keys([path]))
+            self._file = open(path, 'a', encoding='utf-8')
+
+    def __contains__(self, key):
+        return str(key) in self.done
+
+    def add(self, key):
+        """Marks a key as done."""
+        self.done.add(str(key))
+        if self._file is not None:
+            self._file.write('{}\n'.format(key))
+            self._file.flush()
+
+    def close(self):
+        """Closes the checkpoint file."""
+        if self._file is not None:
+            self._file.close()
+
+
+class Progress(object):
+    """
+    Reports processed items, failures and throughput to a stream
+
+    Args:
+        label (str): Name of the task
+        stream (file, optional): Output stream. Defaults to stderr.
+        interval (float, optional): Seconds between reports. Defaults to 2.
+        enabled (bool, optional): Report at all. Defaults to True.
+    """
+
+    def __init__(self, label, stream=None, interval: float = 2.0, enabled: bool = True):
+        self.label = label
+        self.stream = stream or sys.stderr
+        self.interval = interval
+        self.enabled = enabled
+        self.count = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self._reported = self.started
+
+    def line(self) -> str:
+        """Returns the current state as text."""
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return '{}: {} processed, {} failed, {:.1f}/s, {:.1f}s'.format(
+            self.label, self.count, self.failed, self.count / elapsed, elapsed)
+
+    def update(self, ok: bool = True):
+        """Counts an item and reports if the interval passed."""
+        self.count += 1
+        if not ok:
+            self.failed += 1
+        now = time.monotonic()
+        if self.enabled and now - self._reported >= self.interval:
+            self._reported = now
+            self.stream.write(self.line() + '\n')
+            self.stream.flush()
+
+    def close(self):
+        """Writes the final report."""
+        if self.enabled:
+            self.stream.write(self.line() + '\n')
+            self.stream.flush()
+
+
+def _filter(value):
+    key, separator, value = value.partition('=')
+    if not separator:
+        raise argparse.ArgumentTypeError('{} is not KEY=VALUE'.format(key))
+    return key, value
+
+
+def _filters(values) -> dict:
+    return dict(values or [])
+
+
+def _client(args) -> WorkspaceOneAPI:
+    return WorkspaceOneAPI(**{name: getattr(args, name) for name, _, _ in _CREDENTIALS})
+
+
+def _device_ids(args, client, progress):
+    """Returns (key, DeviceID) pairs of the inputs, serials resolved in one pass."""
+    keys = read_keys(args.input)
+    if not args.serials:
+        return ((key, key) for key in keys)
+    serials = list(keys)
+    resolved = client.devices.resolve_serials(serials)
+    missing = len([serial for serial in serials if serial not in resolved])
+    if missing and progress.enabled:
+        progress.stream.write('{} serial numbers not found\n'.format(missing))
+    return ((serial, resolved.get(serial)) for serial in serials)
+
+
+def _report(results, args, label):
+    """Writes BulkResults to the output and checkpoint, returns the exit code."""
+    checkpoint = Checkpoint(args.checkpoint)
+    progress = Progress(label, enabled=not args.quiet)
+    try:
+        with NDJSONSink(args.output) as sink:
+            for result in results(checkpoint, progress):
+                if result.ok:
+                    checkpoint.add(result.key)
+                sink.write(result.as_dict())
+                progress.update(result.ok)
+    finally:
+        checkpoint.close()
+        progress.close()
+    return 1 if progress.failed else 0
+
+
+def cmd_export(args) -> int:
+    """Streams all devices or users to NDJSON or CSV."""
+    client = _client(args)
+    settings = PagerSettings(args.pager_settings) if args.pager_settings else None
+    filters = _filters(args.filter)
+    if args.resource == 'devices':
+        records = client.devices.iter_extensive_search(settings=settings,
+                                                       page_size=args.page_size, **filters)
+    else:
+        records = client.users.iter_search(settings=settings, page_size=args.page_size,
+                                           **filters)
+    progress = Progress('export {}'.format(args.resource), enabled=not args.quiet)
+    try:
+        # Flushed about once per page instead of once per record
+        with open_sink(args.output, args.format, flush_every=args.page_size) as sink:
+            for record in records:
+                sink.write(record)
+                progress.update()
+    finally:
+        progress.close()
+    return 0
+
+
+def cmd_tags(args) -> int:
+    """Adds a tag to or removes it from the input devices."""
+    client = _client(args)
+
+    def _results(checkpoint, progress):
+        pairs = [pair for pair in _device_ids(args, client, progress)
+                 if pair[0] not in checkpoint]
+        keys = {str(device_id): key for key, device_id in pairs if device_id is not None}
+        for key, device_id in pairs:
+            if device_id is None:
+                yield BulkResult(key, False,
+                                 error=ValueError('No device found for {}'.format(key)))
+        bulk = (client.tags.bulk_add_devices if args.action == 'add'
+                else client.tags.bulk_remove_devices)
+        for result in bulk(args.tag_id, list(keys), batch_size=args.batch_size,
+                           max_workers=args.concurrency, rate_limit=args.rate_limit):
+            # Report by the input key (serial number or device ID)
+            result.key = keys[str(result.key)]
+            yield result
+
+    return _report(_results, args, 'tags {}'.format(args.action))
+
+
+def cmd_command(args) -> int:
+    """Sends a device command to the input devices."""
+    client = _client(args)
+
+    def _send(pair):
+        if pair[1] is None:
+            raise ValueError('No device found for {}'.format(pair[0]))
+        return client.devices.send_commands_for_device_id(args.command, pair[1])
+
+    def _results(checkpoint, progress):
+        pairs = (pair for pair in _device_ids(args, client, progress)
+                 if pair[0] not in checkpoint)
+        for result in iter_bulk(_send, pairs, max_workers=args.concurrency,
+                                rate_limit=args.rate_limit):
+            result.key = result.key[0]
+            yield result
+
+    return _report(_results, args, 'command {}'.format(args.command))
+
+
+def cmd_inventory(args) -> int:
+    """Writes all devices to a memory mapped snapshot file."""
+    client = _client(args)
+    filters = _filters(args.filter)
+    if args.root_og:
+        records = client.devices.crawl(args.root_og, platforms=args.platform,
+                                       max_workers=args.concurrency,
+                                       page_size=args.page_size, **filters)
+    else:
+        settings = PagerSettings(args.pager_settings) if args.pager_settings else None
+        records = client.devices.iter_extensive_search(settings=settings,
+                                                       page_size=args.page_size, **filters)
+    progress = Progress('inventory sync', enabled=not args.quiet)
+
+    def _counted(records):
+        for record in records:
+            progress.update()
+            yield record
+
+    try:
+        write_snapshot(args.snapshot, _counted(records))
+    finally:
+        progress.close()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Returns the argument parser of the console script."""
+    common = argparse.ArgumentParser(add_help=False)
+    for name, variable, text in _CREDENTIALS:
+        common.add_argument('--{}'.format(name.replace('_', '-')), dest=name,
+                            default=os.environ.get(variable),
+                            help='{} (env {})'.format(text, variable))
+    common.add_argument('-c', '--concurrency', type=int, default=8,
+                        help='Concurrent requests (default: 8)')
+    common.add_argument('--rate-limit', type=float, default=None,
+                        help='Maximum requests per second (default: unlimited)')
+    common.add_argument('--page-size', type=int, default=500,
+                        help='Initial records per page of searches (default: 500)')
+    common.add_argument('-q', '--quiet', action='store_true',
+                        help='No progress and throughput reports on stderr')
+    common.add_argument('-v', '--verbose', action='count', default=0,
+                        help='Log more on stderr, -v for info, -vv for debug '
+                             '(default: warnings only)')
+
+    bulk = argparse.ArgumentParser(add_help=False)
+    bulk.add_argument('-i', '--input', action='append', default=None,
+                      help='File with one key per line, - for stdin '
+                           '(repeatable, default: stdin)')
+    bulk.add_argument('--serials', action='store_true',
+                      help='Inputs are serial numbers instead of device IDs')
+    bulk.add_argument('-o', '--output', default='-',
+                      help='NDJSON file of the results (default: stdout)')
+    bulk.add_argument('--checkpoint', default=None,
+                      help='File of processed keys; keys in it are skipped on rerun')
+
+    search = argparse.ArgumentParser(add_help=False)
+    search.add_argument('--filter', action='append', type=_filter, metavar='KEY=VALUE',
+                        help='Search filter, e.g. platform=Apple (repeatable)')
+    search.add_argument('--pager-settings',
+                        help='JSON file of learned page sizes and timeouts')
+
+    parser = argparse.ArgumentParser(
+        prog='pyws1uem', description='Exports and bulk actions for Workspace ONE UEM')
+    commands = parser.add_subparsers(dest='subcommand', metavar='command')
+    commands.required = True
+
+    export = commands.add_parser('export', parents=[common, search],
+                                 help='Stream devices or users to NDJSON/CSV')
+    export.add_argument('resource', choices=('devices', 'users'))
+    export.add_argument('-o', '--output', default='-', help='Output file (default: stdout)')
+    export.add_argument('--format', choices=('ndjson', 'csv'), default=None,
+                        help='Output format (default: by file extension, else ndjson)')
+    export.set_defaults(func=cmd_export)
+
+    tags = commands.add_parser('tags', parents=[common, bulk],
+                               help='Add or remove a tag on many devices')
+    tags.add_argument('action', choices=('add', 'remove'))
+    tags.add_argument('tag_id')
+    tags.add_argument('--batch-size', type=int, default=500,
+                      help='Devices per request (default: 500)')
+    tags.set_defaults(func=cmd_tags)
+
+    command = commands.add_parser('command', parents=[common, bulk],
+                                  help='Send a device command to many devices')
+    command.add_argument('command', help='e.g. LockDevice, SyncDevice, DeviceQuery')
+    command.set_defaults(func=cmd_command)
+
+    inventory = commands.add_parser('inventory', help='Inventory snapshots')
+    inventory_commands = inventory.add_subparsers(dest='inventory_command', metavar='command')
+    inventory_commands.required = True
+    sync = inventory_commands.add_parser('sync', parents=[common, search],
+                                         help='Write all devices to a snapshot file')
+    sync.add_argument('snapshot', help='Path of the snapshot file')
+    sync.add_argument('--root-og', type=int, default=None,
+                      help='Crawl the fleet below this OG ID in concurrent shards')
+    sync.add_argument('--platform', action='append', default=None,
+                      help='Split the crawl shards by platform (repeatable)')
+    sync.set_defaults(func=cmd_inventory)
+    return parser
+
+
+def _configure_logging(verbose):
+    # Importing the client turns on debug logging, which would mix the
+    # urllib3 connection lines into the progress output
+    level = {0: logging.WARNING, 1: logging.INFO}.get(verbose, logging.DEBUG)
+    logging.getLogger().setLevel(level)
+    for name in ('urllib3', 'requests.packages.urllib3'):
+        logging.getLogger(name).setLevel(level)
+
+
+def main(argv=None) -> int:
+    """Entry point of the pyws1uem console script."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    _configure_logging(args.verbose)
+    missing = [variable for name, variable, _ in _CREDENTIALS if not getattr(args, name)]
+    if missing:
+        parser.error('missing credentials: {}'.format(', '.join(missing)))
+    if getattr(args, 'input', False) is None:
+        args.input = ['-']
+    try:
+        return args.func(args)
+    except KeyboardInterrupt:
+        return 130
+
+
+if __name__ == '__main__':
+    sys.exit(main())
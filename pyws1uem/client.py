@@ -9,16 +9,24 @@ using the WorkspaceOneAPIError Class.
 """
 
 from __future__ import print_function, absolute_import
+import gzip
 import logging
-import requests
+import threading
 import time
 from email.utils import formatdate
-from .error import WorkspaceOneAPIError
+from json import dumps as json_dumps
+from .decoding import decode_json, is_json_content_type
+from .error import WorkspaceOneAPIError, RateLimitError
+from .profiling import Profiler
+from .stats import TransferStats
+from .transport import LiveTransport, Transport
 from .mdm.devices import Devices
 from .system.groups import Groups
 from .system.users import Users
 from .system.info import Info
 from .mdm.tags import Tags
+from .mam.apps import Apps
+from .mem.email import Email
 
 
 # Enabling debugging at http.client level (requests->urllib3->http.client)
@@ -46,7 +54,9 @@ class WorkspaceOneAPI(object):
     Class for building a WorkspaceONE UEM API Object
     """
 
-    def __init__(self, env: str, auth_url: str, client_id: str, client_secret: str, aw_tenant_code: str):
+    def __init__(self, env: str, auth_url: str, client_id: str, client_secret: str, aw_tenant_code: str,
+                 transport: Transport = None, compress_requests_over: int = None,
+                 profile: bool = False):
         """
         Initialize an AirWatchAPI Client Object.
 
@@ -55,6 +65,12 @@ class WorkspaceOneAPI(object):
                 client_id: Generated in OAuth Client Management in Workspace One
                 client_secret: Generated in OAuth Client Management in Workspace One
                 aw_tenant_code: API key from Workspace One
+                transport: Transport sending the requests, e.g. a RecordTransport or
+                           ReplayTransport for offline testing. Defaults to LiveTransport.
+                compress_requests_over: Gzip JSON request bodies larger than this
+                           number of bytes (e.g. bulk payloads). Defaults to None (off).
+                profile: Time every request phase per endpoint from the start,
+                         see profiler and profile(). Defaults to False.
         """
         self.env = env
         self.auth_url = auth_url
@@ -64,30 +80,47 @@ class WorkspaceOneAPI(object):
         self.access_token = None
         self.token_acquire_time = 0
         self.token_expiry_seconds = 3600
+        self._token_lock = threading.Lock()
+        self.transport = transport or LiveTransport()
+        self.compress_requests_over = compress_requests_over
+        self.stats = TransferStats()
+        self._local = threading.local()
         self.groups = Groups(self)
         self.devices = Devices(self)
         self.users = Users(self)
         self.info = Info(self)
         self.tags = Tags(self)
+        self.apps = Apps(self)
+        self.email = Email(self)
+        self.profiler = Profiler(self)
+        if profile:
+            self.profiler.enable()
 
-    def get(self, module, path, version=None, params=None, header=None, timeout=30):
+    def profile(self, path=None):
+        """
+        Context manager timing the request phases (token, header, endpoint,
+        transport, error check/decoding) of the client calls in its block.
+        The timings are kept in self.profiler (see format_table).
+
+        :param path: Optional output, a cProfile dump for .prof/.pstats files
+                     or folded stacks for flamegraph.pl otherwise
+        """
+        return self.profiler.profile(path)
+
+    def get(self, module, path, version=None, params=None, header=None, timeout=30,
+            raw=False):
         """
         Sends a GET request to the API. Returns the response object.
+        With raw=True the undecoded response body (bytes) is returned
+        for successful responses.
         """
-        if header is None:
-            header = {}
+        header = dict(header or {})
         header.update(
             self._build_header(header)
         )
         header.update({"Content-Type": "application/json"})
-        endpoint = self._build_endpoint(self.env, module, path, version)
-        try:
-            api_response = requests.get(
-                endpoint, params=params, headers=header, timeout=timeout)
-            api_response = self._check_for_error(api_response)
-            return api_response
-        except WorkspaceOneAPIError as api_error:
-            raise api_error
+        return self._request("GET", module, path, version, params=params,
+                             header=header, timeout=timeout, raw=raw)
 
     def post(
         self,
@@ -103,25 +136,12 @@ class WorkspaceOneAPI(object):
         """
         Sends a POST request to the API. Returns the response object.
         """
-        if header is None:
-            header = {}
+        header = dict(header or {})
         header.update(
             self._build_header(header)
         )
-        endpoint = self._build_endpoint(self.env, module, path, version)
-        try:
-            api_response = requests.post(
-                endpoint,
-                params=params,
-                data=data,
-                json=json,
-                headers=header,
-                timeout=timeout,
-            )
-            api_response = self._check_for_error(api_response)
-            return api_response
-        except WorkspaceOneAPIError as api_error:
-            raise api_error
+        return self._request("POST", module, path, version, params=params,
+                             data=data, json=json, header=header, timeout=timeout)
 
     def put(
         self,
@@ -137,25 +157,12 @@ class WorkspaceOneAPI(object):
         """
         Sends a PUT request to the API. Returns the response object.
         """
-        if header is None:
-            header = {}
+        header = dict(header or {})
         header.update(
             self._build_header(header)
         )
-        endpoint = self._build_endpoint(self.env, module, path, version)
-        try:
-            api_response = requests.put(
-                endpoint,
-                params=params,
-                data=data,
-                json=json,
-                headers=header,
-                timeout=timeout,
-            )
-            api_response = self._check_for_error(api_response)
-            return api_response
-        except WorkspaceOneAPIError as api_error:
-            raise api_error
+        return self._request("PUT", module, path, version, params=params,
+                             data=data, json=json, header=header, timeout=timeout)
 
     def patch(
         self,
@@ -171,27 +178,12 @@ class WorkspaceOneAPI(object):
         """
         Sends a Patch request to the API. Returns the response object.
         """
-        if header is None:
-            header = {}
+        header = dict(header or {})
         header.update(
             self._build_header(header)
         )
-        endpoint = self._build_endpoint(self.env, module, path, version)
-        try:
-            api_response = requests.patch(
-                endpoint,
-                params=params,
-                data=data,
-                json=json,
-                headers=header,
-                timeout=timeout,
-            )
-            api_response = self._check_for_error(api_response)
-            return api_response
-        except WorkspaceOneAPIError as api_error:
-            raise api_error
-
-    # NOQA
+        return self._request("PATCH", module, path, version, params=params,
+                             data=data, json=json, header=header, timeout=timeout)
 
     def delete(
         self,
@@ -207,14 +199,39 @@ class WorkspaceOneAPI(object):
         """
         Sends a DELETE request to the API. Returns the response object.
         """
-        if header is None:
-            header = {}
+        header = dict(header or {})
         header.update(
             self._build_header(header)
         )
+        return self._request("DELETE", module, path, version, params=params,
+                             data=data, json=json, header=header, timeout=timeout)
+
+    def _request(self, method, module, path, version=None, params=None,
+                 data=None, json=None, header=None, timeout=30, raw=False):
+        """
+        Sends the request through the transport and checks the response
+        for errors.
+        """
         endpoint = self._build_endpoint(self.env, module, path, version)
+        bytes_sent = wire_bytes_sent = 0
+        if json is not None:
+            # Sent as data, so the body is serialized only once
+            data, json = json_dumps(json).encode("utf-8"), None
+            bytes_sent = wire_bytes_sent = len(data)
+            header = dict(header or {})
+            header["Content-Type"] = "application/json"
+            if self.compress_requests_over is not None \
+                    and len(data) > self.compress_requests_over:
+                # mtime=0 keeps the body reproducible for record/replay
+                data = gzip.compress(data, compresslevel=5, mtime=0)
+                wire_bytes_sent = len(data)
+                header["Content-Encoding"] = "gzip"
+        elif isinstance(data, (bytes, str)):
+            bytes_sent = wire_bytes_sent = len(data)
         try:
-            api_response = requests.delete(
+            started = time.perf_counter()
+            api_response = self.transport.request(
+                method,
                 endpoint,
                 params=params,
                 data=data,
@@ -222,23 +239,40 @@ class WorkspaceOneAPI(object):
                 headers=header,
                 timeout=timeout,
             )
+            self._local.last_transfer = self.stats.record_response(
+                method, endpoint, api_response,
+                seconds=time.perf_counter() - started,
+                bytes_sent=bytes_sent, wire_bytes_sent=wire_bytes_sent)
+            if raw and api_response.status_code < 400:
+                return api_response.content
             api_response = self._check_for_error(api_response)
             return api_response
         except WorkspaceOneAPIError as api_error:
             raise api_error
 
+    def last_transfer(self) -> dict:
+        """
+        Returns the counters (endpoint, seconds, bytes) of the last request
+        sent by the calling thread, empty before the first request.
+        """
+        return dict(getattr(self._local, 'last_transfer', None) or {})
+
     @staticmethod
     def _check_for_error(response):
         """
         Checks the response for json data, then for an error, then for
         a status code
         """
-        if response.headers.get("Content-Type") in (
-            "application/json",
-            "application/json; charset=utf-8",
-        ):
-            json = response.json()
-            if json.get("errorCode"):
+        if response.status_code == 429:
+            retry_after = response.headers.get("Retry-After")
+            try:
+                retry_after = float(retry_after)
+            except (TypeError, ValueError):
+                retry_after = None
+            raise RateLimitError(retry_after=retry_after)
+        if is_json_content_type(response.headers.get("Content-Type")) and response.content:
+            json = decode_json(response.content)
+            if isinstance(json, dict) and json.get("errorCode"):
                 raise WorkspaceOneAPIError(json_response=json)
             else:
                 return json
@@ -284,18 +318,23 @@ class WorkspaceOneAPI(object):
             "grant_type": "client_credentials"
         }
         try:
-            api_response = requests.post(
+            api_response = self.transport.request(
+                "POST",
                 self.auth_url,
                 data=data,
                 headers=header,
             )
-            api_response_code = self._check_for_error(api_response)
-            if api_response_code == 200:
-                self.access_token = api_response.json()["access_token"]
+            self._check_for_error(api_response)
+            if api_response.status_code == 200:
+                self.access_token = decode_json(api_response.content)["access_token"]
                 self.token_acquire_time = time.perf_counter()
         except WorkspaceOneAPIError as api_error:
             raise api_error
 
+    def _token_expired(self):
+        return (not self.access_token
+                or time.perf_counter() - self.token_acquire_time > self.token_expiry_seconds)
+
     def _build_header(self, header=None):
         """
         Build the header with OAuth. Built in monitoring of the
@@ -304,13 +343,16 @@ class WorkspaceOneAPI(object):
         """
         if not header:
             header = {}
-        if not self.access_token or time.perf_counter() - self.token_acquire_time > self.token_expiry_seconds:
-            self._generate_access_token(header)
-        if header.get("Content-Type"):
-            del header["Content-Type"]
+        if self._token_expired():
+            # Concurrent bulk calls share one token refresh
+            with self._token_lock:
+                if self._token_expired():
+                    self._generate_access_token()
         header.update({"Authorization": f"Bearer {self.access_token}"})
         header.update({"aw-tenant-code": self.aw_tenant_code})
         header.update({'Date': formatdate(timeval=None, localtime=False, usegmt=True)})
         if not header.get("Accept"):
             header.update({"Accept": "application/json"})
+        if not header.get("Accept-Encoding"):
+            header.update({"Accept-Encoding": "gzip, deflate"})
         return header
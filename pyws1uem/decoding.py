@@ -0,0 +1,86 @@
+"""
+Decoding Module
+--
+Pluggable JSON decoding of API responses. The fastest installed backend
+is used (orjson, msgspec, ujson) with the standard library as fallback.
+Response bodies are decoded straight from the raw bytes, without building
+an intermediate text copy first.
+
+The backend can be chosen explicitly, e.g. for benchmarks:
+
+    from pyws1uem import decoding
+    decoding.set_decoder('json')
+"""
+
+import json
+
+BACKENDS = ('orjson', 'msgspec', 'ujson', 'json')
+
+
+def _load_backend(name):
+    """Returns the decode function of a backend or None if not installed."""
+    try:
+        if name == 'orjson':
+            import orjson  # pylint: disable=import-outside-toplevel
+            return orjson.loads
+        if name == 'msgspec':
+            import msgspec.json  # pylint: disable=import-outside-toplevel
+            return msgspec.json.decode
+        if name == 'ujson':
+            import ujson  # pylint: disable=import-outside-toplevel
+            return ujson.loads
+    except ImportError:
+        return None
+    if name == 'json':
+        return json.loads
+    raise ValueError('Unknown JSON backend {}, expected one of {}'.format(
+        name, ', '.join(BACKENDS)))
+
+
+def available_backends() -> list:
+    """Returns the names of the installed backends, fastest first."""
+    return [name for name in BACKENDS if _load_backend(name) is not None]
+
+
+def set_decoder(name=None) -> str:
+    """
+    Selects the JSON backend used to decode responses.
+
+    Args:
+        name (str, optional): One of orjson, msgspec, ujson, json.
+            Defaults to None (fastest installed backend).
+
+    Returns:
+        str: Name of the selected backend
+    """
+    global _decode, backend  # pylint: disable=global-statement
+    names = BACKENDS if name is None else (name,)
+    for candidate in names:
+        loads = _load_backend(candidate)
+        if loads is not None:
+            _decode, backend = loads, candidate
+            return candidate
+    raise ImportError('JSON backend {} is not installed'.format(name))
+
+
+def decode_json(content):
+    """Decodes a JSON document from bytes (or str) with the selected backend."""
+    return _decode(content)
+
+
+def is_json_content_type(content_type) -> bool:
+    """
+    Returns True for JSON media types, ignoring case, parameters and
+    whitespace, e.g. 'Application/JSON;charset=UTF-8' or
+    'application/problem+json'.
+    """
+    if not content_type:
+        return False
+    media_type = content_type.split(';', 1)[0].strip().lower()
+    return (media_type in ('application/json', 'text/json')
+            or media_type.endswith('+json'))
+
+
+_decode = json.loads
+backend = 'json'
+set_decoder()
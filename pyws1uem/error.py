@@ -28,3 +28,19 @@ class WorkspaceOneAPIError(Exception):
 
     def __str__(self):
         return 'Error #{}: {}'.format(self.error_code, self.error_msg)
+
+
+class RateLimitError(WorkspaceOneAPIError):
+    """RateLimitError
+
+    Raised when the API answers with HTTP 429 (Too Many Requests).
+
+    Args:
+        retry_after (float): Seconds to wait before retrying as sent by the
+                            API in the Retry-After header, None if unknown
+    """
+    def __init__(self, retry_after=None, json_response=None):
+        WorkspaceOneAPIError.__init__(self, json_response)
+        self.retry_after = retry_after
+        self.error_code = 429
+        self.error_msg = 'Rate limit exceeded'
@@ -0,0 +1,184 @@
+"""
+Module to manage applications in the WorkspaceONE /mam context.
+"""
+
+import base64
+import json
+import mmap
+import os
+
+from .mam import MAM
+from ..bulk import iter_bulk
+from ..paging import iter_records
+
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+class Apps(MAM):
+    """
+    A class to search, upload and assign applications (MAM).
+    """
+
+    def __init__(self, client):
+        MAM.__init__(self, client)
+
+    def search(self, **kwargs):
+        """Returns the applications matching the search parameters.
+
+        PARAMS:
+            type (str, optional): App type [App, Book]
+            applicationtype (str, optional): [System, Internal, Public, Purchased]
+            applicationname (str, optional): Name of the application
+            category (str, optional): Category of the application
+            locationgroupid (int, optional): OrganizationGroup ID
+            bundleid (str, optional): Bundle ID of the application
+            platform (str, optional): Platform of the application
+            status (str, optional): [Active, Inactive]
+            page (int, optional): Page number, 0 based. Defaults to 0.
+            pagesize (int, optional): Records per page. Defaults to 500.
+
+        Returns:
+            dict: API page of applications
+        """
+        return MAM._get(self, path='/apps/search', params=kwargs)
+
+    def iter_apps(self, page_size: int = 500, **kwargs):
+        """
+        Yields the applications matching the search parameters over all pages.
+        """
+        return iter_records(self.search, page_size=page_size,
+                            items_key='Application', **kwargs)
+
+    def get_internal_app(self, application_id):
+        """Returns the details of an internal application."""
+        return MAM._get(self, path='/apps/internal/{}'.format(application_id))
+
+    def get_assignments(self, application_uuid):
+        """Returns the assignment rules of an application."""
+        _path = '/apps/{}/assignment-rule'.format(application_uuid)
+        return MAM._get(self, path=_path)
+
+    def get_assignments_many(self, application_uuids, max_workers: int = 8,
+                             rate_limit: float = None):
+        """Get the assignments of many applications concurrently.
+
+        Args:
+            application_uuids (iterable): UUIDs of the applications
+            max_workers (int, optional): Concurrent requests. Defaults to 8.
+            rate_limit (float, optional): Maximum requests per second. Defaults to None.
+
+        Yields:
+            BulkResult: Assignments per application UUID as they complete
+        """
+        return iter_bulk(self.get_assignments, application_uuids,
+                         max_workers=max_workers, rate_limit=rate_limit)
+
+    def add_assignment(self, application_id, assignment: dict):
+        """Assigns an internal application to smart groups.
+
+        Args:
+            application_id (int): ID of the internal application
+            assignment (dict): Assignment as expected by the API, e.g.
+                {"SmartGroupIds": [1], "DeploymentParameters": {...}}
+        """
+        _path = '/apps/internal/{}/assignments'.format(application_id)
+        return MAM._post(self, path=_path, json=assignment)
+
+    def upload_blob(self, file_path, organization_group_id, filename=None):
+        """Upload a file to /mam/blobs as a stream.
+
+        The file is handed to the transport as an open file object and sent
+        in blocks, so packages of hundreds of MB are never loaded into memory.
+
+        Args:
+            file_path (str): Path of the application package
+            organization_group_id (int): OrganizationGroup ID the blob is uploaded to
+            filename (str, optional): File name sent to the API.
+                Defaults to the base name of file_path.
+
+        Returns:
+            dict: API response with the ID of the blob
+        """
+        _params = {'filename': filename or os.path.basename(file_path),
+                   'organizationgroupid': organization_group_id}
+        _header = {'Content-Type': 'application/octet-stream'}
+        with open(file_path, 'rb') as package:
+            return MAM._post(self, path='/blobs/uploadblob', params=_params,
+                             data=package, header=_header)
+
+    @staticmethod
+    def _upload_state_path(file_path):
+        return '{}.upload.json'.format(file_path)
+
+    @staticmethod
+    def _read_upload_state(state_path, size, mtime):
+        try:
+            with open(state_path, 'r', encoding='utf-8') as state_file:
+                state = json.load(state_file)
+        except (OSError, ValueError):
+            return None
+        if state.get('size') != size or state.get('mtime') != mtime:
+            return None
+        return state
+
+    def upload_chunks(self, file_path, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      resume: bool = True):
+        """Upload an application package in chunks that can be resumed.
+
+        The file is memory mapped and sent chunk by chunk to
+        /mam/apps/internal/uploadchunk. After every chunk the transaction ID
+        and the next chunk number are stored next to the file, so an
+        interrupted upload continues with the first missing chunk.
+
+        Args:
+            file_path (str): Path of the application package
+            chunk_size (int, optional): Bytes per chunk. Defaults to 4 MiB.
+            resume (bool, optional): Continue a previous upload of the same
+                (unchanged) file. Defaults to True.
+
+        Returns:
+            str: Transaction ID to be used with begin_install
+        """
+        stat = os.stat(file_path)
+        size, mtime = stat.st_size, int(stat.st_mtime)
+        if size == 0:
+            raise ValueError('{} is empty'.format(file_path))
+        state_path = self._upload_state_path(file_path)
+        state = self._read_upload_state(state_path, size, mtime) if resume else None
+        if state is None or state.get('chunk_size') != chunk_size:
+            state = {'size': size, 'mtime': mtime, 'chunk_size': chunk_size,
+                     'transaction_id': None, 'next_chunk': 1}
+        chunks = max(1, (size + chunk_size - 1) // chunk_size)
+        with open(file_path, 'rb') as package:
+            with mmap.mmap(package.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for sequence in range(state['next_chunk'], chunks + 1):
+                    offset = (sequence - 1) * chunk_size
+                    chunk = mapped[offset:offset + chunk_size]
+                    response = MAM._post(self, path='/apps/internal/uploadchunk', json={
+                        'TransactionId': state['transaction_id'],
+                        'ChunkData': base64.b64encode(chunk).decode('ascii'),
+                        'ChunkSequenceNumber': sequence,
+                        'TotalApplicationSize': size,
+                        'ChunkSize': len(chunk),
+                    })
+                    if isinstance(response, dict):
+                        # The API spells the key "TranscationId" in its responses
+                        state['transaction_id'] = (response.get('TranscationId')
+                                                   or response.get('TransactionId')
+                                                   or state['transaction_id'])
+                    state['next_chunk'] = sequence + 1
+                    with open(state_path, 'w', encoding='utf-8') as state_file:
+                        json.dump(state, state_file)
+        if os.path.exists(state_path):
+            os.remove(state_path)
+        return state['transaction_id']
+
+    def begin_install(self, **kwargs):
+        """Creates the internal application from an uploaded blob or chunk
+        transaction.
+
+        PARAMS:
+            TransactionId or BlobId, ApplicationName, DeviceType,
+            LocationGroupId, SupportedModels, PushMode, ...
+        """
+        return MAM._post(self, path='/apps/internal/begininstall', json=kwargs)
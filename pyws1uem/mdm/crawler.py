@@ -0,0 +1,274 @@
+"""
+Module to crawl the whole device fleet in shards in the WorkspaceONE /mdm context.
+
+Instead of one long extensive_search pagination chain over the global OG,
+the fleet is split into shards by organization group and platform. The
+shards are crawled concurrently, each with its own adaptive page size and
+timeout, and the results are merged and deduplicated by DeviceID.
+
+extensive_search always returns the whole subtree of an OG, so the shards
+are disjoint subtrees: count probes (pagesize=1) find the OGs without own
+devices, whose children are crawled instead. An OG with own devices and
+child OGs is crawled as one subtree, split into page ranges that are
+fetched concurrently.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ..bulk import run_bulk
+from ..paging import AdaptivePager, iter_records, records_of, total_of, unwrap_values
+from .watcher import device_id_of
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class Shard(object):
+    """
+    A part of the fleet crawled with a single pagination chain
+
+    Attributes:
+        organization_group_id (int): OG ID of the shard (with its subtree)
+        platform (str): Platform filter, None for all platforms
+        pages (tuple): (first page, stop page) of the crawler page size,
+            stop None for all remaining pages. None to crawl the whole
+            search with an adaptive page size.
+        records (int): Records returned so far
+        error (Exception): Error that stopped the shard, None if it completed
+    """
+    __slots__ = ('organization_group_id', 'platform', 'pages', 'records',
+                 'error', 'seconds')
+
+    def __init__(self, organization_group_id, platform=None, pages=None):
+        self.organization_group_id = organization_group_id
+        self.platform = platform
+        self.pages = pages
+        self.records = 0
+        self.error = None
+        self.seconds = 0.0
+
+    def filters(self):
+        """Returns the extensive_search filters of the shard."""
+        query = {'organizationgroupid': self.organization_group_id}
+        if self.platform:
+            query['platform'] = self.platform
+        return query
+
+    def __repr__(self):
+        if self.pages is None:
+            return 'Shard(og={}, platform={})'.format(self.organization_group_id,
+                                                      self.platform)
+        return 'Shard(og={}, platform={}, pages={})'.format(
+            self.organization_group_id, self.platform, self.pages)
+
+
+class FleetCrawler(object):
+    """
+    Crawls extensive_search in concurrent shards
+
+    Args:
+        client (WorkspaceOneAPI): Client with devices and groups resources
+        root_og_id (int): OG ID of the top of the crawled tree
+        platforms (list, optional): Platforms to split every OG shard by.
+            Defaults to None (no platform split).
+        shards (list, optional): Shard objects to crawl instead of the
+            planned ones. Defaults to None.
+        max_workers (int, optional): Shards crawled at the same time. Defaults to 8.
+        page_size (int, optional): Initial page size of every shard. Defaults to 500.
+        timeout (float, optional): Request timeout per shard page. Defaults to 60.
+        shard_deadline (float, optional): Seconds after which a shard is
+            given up. Defaults to None (no deadline).
+        settings (PagerSettings, optional): Learned page size and timeout
+            per shard, reused by the next crawl. Defaults to None.
+        **filters: Further extensive_search filters applied to every shard
+    """
+
+    def __init__(self, client, root_og_id, platforms=None, shards=None,
+                 max_workers: int = 8, page_size: int = 500, timeout: float = 60,
+                 shard_deadline: float = None, settings=None, **filters):
+        self.client = client
+        self.root_og_id = root_og_id
+        self.platforms = list(platforms) if platforms else [None]
+        self.shards = shards
+        self.max_workers = max_workers
+        self.page_size = page_size
+        self.timeout = timeout
+        self.shard_deadline = shard_deadline
+        self.settings = settings
+        self.filters = filters
+        self.duplicates = 0
+        self._stop = threading.Event()
+
+    def _children(self) -> dict:
+        """Returns OG ID -> direct child OG IDs for the tree below the root."""
+        children = {}
+        for child in self.client.groups.get_children(self.root_og_id):
+            child = unwrap_values(child)
+            parent = child.get('ParentLocationGroup')
+            if isinstance(parent, dict):
+                parent = parent.get('Id', {}).get('Value')
+            if parent is None:
+                parent = self.root_og_id
+            children.setdefault(str(parent), []).append(child.get('Id'))
+        return children
+
+    def _total(self, key):
+        """Returns the device count of an (OG ID, platform) search, None if unknown."""
+        og_id, platform = key
+        query = dict(self.filters)
+        query.update(organizationgroupid=og_id, page=0, pagesize=1)
+        if platform:
+            query['platform'] = platform
+        response = self.client.devices.extensive_search(timeout=self.timeout, **query)
+        if not records_of(response, 'Devices'):
+            return 0
+        return total_of(response)
+
+    def _totals(self, keys) -> dict:
+        results = run_bulk(self._total, keys, max_workers=self.max_workers)
+        return {result.key: result.response if result.ok else None for result in results}
+
+    def _range_shards(self, og_id) -> list:
+        """Splits the subtree of an OG into page ranges per platform."""
+        shards = []
+        totals = self._totals([(og_id, platform) for platform in self.platforms])
+        for (_, platform), total in totals.items():
+            if total == 0:
+                continue
+            pages = -(-total // self.page_size) if total else 1
+            step = -(-pages // min(self.max_workers, pages))
+            if total is None or step >= pages:
+                shards.append(Shard(og_id, platform))
+                continue
+            firsts = range(0, pages, step)
+            shards.extend(Shard(og_id, platform, pages=(first, first + step))
+                          for first in firsts[:-1])
+            # The last range runs to the end, in case devices were added
+            shards.append(Shard(og_id, platform, pages=(firsts[-1], None)))
+        return shards
+
+    def plan(self) -> list:
+        """
+        Returns disjoint shards covering the tree below the root OG.
+
+        Starting at the root, an OG whose device count equals the sum of
+        its children's counts has no own devices and is replaced by its
+        children (OGs without devices are dropped). Leaf OGs become one
+        shard per platform; OGs with own devices and children become page
+        range shards of their subtree. No device is fetched twice.
+        """
+        if self.shards is not None:
+            return self.shards
+        children = self._children()
+        totals = {}
+        self.shards = []
+        level = [self.root_og_id]
+        while level:
+            probe = [og_id for parent in level
+                     for og_id in [parent] + children.get(str(parent), [])
+                     if og_id not in totals]
+            totals.update((og_id, total) for (og_id, _), total in
+                          self._totals([(og_id, None) for og_id in probe]).items())
+            below = []
+            for og_id in level:
+                total = totals[og_id]
+                child_ids = children.get(str(og_id), [])
+                child_totals = [totals[child_id] for child_id in child_ids]
+                if total == 0:
+                    continue
+                if not child_ids:
+                    self.shards.extend(Shard(og_id, platform) for platform in self.platforms)
+                elif total is not None and None not in child_totals \
+                        and total == sum(child_totals):
+                    below.extend(child_ids)
+                else:
+                    self.shards.extend(self._range_shards(og_id))
+            level = below
+        return self.shards
+
+    def _put(self, output, item):
+        while not self._stop.is_set():
+            try:
+                output.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _iter_shard(self, shard, query):
+        fetch = self.client.devices.extensive_search
+        if shard.pages is None:
+            pager = AdaptivePager(fetch, page_size=self.page_size, timeout=self.timeout,
+                                  items_key='Devices', client=self.client,
+                                  settings=self.settings,
+                                  endpoint='mdm/devices/extensivesearch {}'.format(shard))
+            return pager.iter_records(**query)
+        # Page ranges keep the crawler page size, page numbers depend on it
+        return iter_records(fetch, page_size=self.page_size, start_page=shard.pages[0],
+                            items_key='Devices', timeout=self.timeout, **query)
+
+    def _crawl_shard(self, shard, output):
+        started = time.monotonic()
+        query = dict(self.filters)
+        query.update(shard.filters())
+        limit = None
+        if shard.pages is not None and shard.pages[1] is not None:
+            limit = (shard.pages[1] - shard.pages[0]) * self.page_size
+        try:
+            for record in self._iter_shard(shard, query):
+                shard.records += 1
+                if not self._put(output, record):
+                    return
+                if shard.records == limit:
+                    break
+                if self.shard_deadline and time.monotonic() - started > self.shard_deadline:
+                    raise TimeoutError('{} exceeded its deadline'.format(shard))
+        except Exception as error:  # pylint: disable=broad-except
+            logger.warning('Crawling %r failed: %s', shard, error)
+            shard.error = error
+        finally:
+            shard.seconds = time.monotonic() - started
+            self._put(output, _DONE)
+
+    def crawl(self):
+        """
+        Crawls all shards concurrently.
+
+        Yields:
+            dict: Every device record once, in arrival order
+        """
+        shards = self.plan()
+        output = queue.Queue(maxsize=self.max_workers * self.page_size)
+        seen = set()
+        self.duplicates = 0
+        self._stop.clear()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            for shard in shards:
+                executor.submit(self._crawl_shard, shard, output)
+            running = len(shards)
+            while running:
+                record = output.get()
+                if record is _DONE:
+                    running -= 1
+                    continue
+                device_id = device_id_of(record)
+                if device_id in seen:
+                    self.duplicates += 1
+                    continue
+                seen.add(device_id)
+                yield record
+        finally:
+            # Unblocks the shards if the consumer stopped early
+            self._stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @property
+    def failed_shards(self) -> list:
+        """Shards that stopped with an error during the last crawl."""
+        return [shard for shard in self.shards or [] if shard.error is not None]
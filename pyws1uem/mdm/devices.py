@@ -3,6 +3,13 @@ Module to manage devices in the WorkspaceONE /mdm context.
 """
 
 from .mdm import MDM
+from ..bulk import iter_bulk, run_bulk
+from ..error import RateLimitError
+from ..paging import PAGER_ARGS, AdaptivePager, iter_records, unwrap_values
+from ..pipeline import iter_processed_pages
+from .crawler import FleetCrawler
+from .store import DeviceStore
+from .watcher import DeviceWatcher
 
 
 class Devices(MDM):
@@ -22,17 +29,33 @@ class Devices(MDM):
         _header = {'Accept': 'application/json;version=2'}
         return MDM._get(self, path='/devices/search', header=_header, params=kwargs)
 
-    def searchv3(self, **kwargs):
+    def searchv3(self, timeout=30, **kwargs):
         """Returns the Device information matching the search parameters with v3 endpoint."""
         _header = {'Accept': 'application/json;version=3'}
-        return MDM._get(self, path='/devices/search', header=_header, params=kwargs)
+        return MDM._get(self, path='/devices/search', header=_header, params=kwargs,
+                        timeout=timeout)
+
+    def iter_searchv3(self, settings=None, **kwargs):
+        """Yields the devices of searchv3 over all pages with adaptive paging.
+
+        Args:
+            settings (PagerSettings, optional): Learned page size and timeout
+                to start from, updated after the search. Defaults to None.
+            **kwargs: AdaptivePager arguments (page_size, target_latency,
+                max_page_bytes, ...) and searchv3 filters
+        """
+        pager_args = {key: kwargs.pop(key) for key in PAGER_ARGS if key in kwargs}
+        pager = AdaptivePager(self.searchv3, items_key='Devices', client=self.client,
+                              settings=settings, endpoint='mdm/devices/search;version=3',
+                              page_size_param='page_size', **pager_args)
+        return pager.iter_records(**kwargs)
 
     def search_all(self, **kwargs):
         """Returns the Devices matching the search parameters."""
         response = MDM._get(self, path='/devices/search', params=kwargs)
         return response
 
-    def extensive_search(self, **kwargs):
+    def extensive_search(self, timeout=30, **kwargs):
         """Full device details search with many attributes included.
 
         PARAMS:
@@ -61,14 +84,178 @@ class Devices(MDM):
                 Defaults to 0.
             pagesize (int, optional): Maximumm records per page. Defaults to 500.
             macaddress (str, optional): MAC address. Defaults to None.
+            timeout (int, optional): Request timeout in seconds (not sent to the API).
+                Defaults to 30.
 
         Returns:
             dict: API paged of devices that meet the search requirements.
         """
         response = MDM._get(
-            self, path='/devices/extensivesearch', params=kwargs)
+            self, path='/devices/extensivesearch', params=kwargs, timeout=timeout)
         return response
 
+    def watch(self, **kwargs) -> DeviceWatcher:
+        """Returns a DeviceWatcher reporting added/changed/removed devices.
+
+        Args:
+            **kwargs: Arguments of DeviceWatcher (fields, interval, queue,
+                loop, ...) and extensive_search filters
+
+        Returns:
+            DeviceWatcher: Watcher polling this Devices resource
+        """
+        return DeviceWatcher(self, **kwargs)
+
+    DETAIL_KINDS = ('details', 'security', 'managed_admin')
+
+    def _fetch_device(self, device_id, kinds, partial):
+        """
+        Fetches the detail kinds of a device into its record in partial.
+        RateLimitError is raised for iter_bulk to back off and retry; kinds
+        fetched before stay in the record and are not requested again.
+        """
+        record = partial.setdefault(device_id, {'DeviceId': device_id, 'errors': {}})
+        for kind in kinds:
+            if kind in record:
+                continue
+            try:
+                if kind == 'details':
+                    record['details'] = self.get_details_by_device_id(device_id)
+                elif kind == 'security':
+                    record['security'] = self.get_security_info_by_id(device_id)
+                elif kind == 'managed_admin':
+                    if 'details' in record:
+                        details = record['details']
+                        if details is None:
+                            raise ValueError('No device details: {}'.format(
+                                record['errors']['details']))
+                    else:
+                        details = self.get_details_by_device_id(device_id)
+                    record['managed_admin'] = self.get_managed_admin_account_by_uuid(
+                        details['Uuid'])
+            except RateLimitError:
+                raise
+            except Exception as error:  # pylint: disable=broad-except
+                record[kind] = None
+                record['errors'][kind] = str(error)
+        return partial.pop(device_id)
+
+    def fetch_many(self, device_ids, kinds=DETAIL_KINDS, max_workers: int = 16,
+                   rate_limit: float = None):
+        """Fetch details of many devices on a bounded worker pool.
+
+        Args:
+            device_ids (iterable): DeviceIDs, may be lazy
+            kinds (tuple, optional): Any of 'details' (get_details_by_device_id),
+                'security' (get_security_info_by_id) and 'managed_admin'
+                (get_managed_admin_account_by_uuid). Defaults to all.
+            max_workers (int, optional): Concurrent devices. Defaults to 16.
+            rate_limit (float, optional): Maximum devices per second. Defaults to None.
+
+        Yields:
+            dict: Merged record per device as it completes, e.g.
+                {"DeviceId": 1, "details": {...}, "security": {...},
+                 "managed_admin": {...}, "errors": {"security": "..."}}
+                Failures are reported per device and kind in "errors".
+                Throttled (HTTP 429) requests are retried after the
+                Retry-After delay.
+        """
+        unknown = set(kinds) - set(self.DETAIL_KINDS)
+        if unknown:
+            raise ValueError('Unknown detail kinds {}'.format(', '.join(sorted(unknown))))
+        # DeviceID -> record of the kinds fetched so far, kept across retries
+        partial = {}
+        for result in iter_bulk(lambda device_id: self._fetch_device(device_id, kinds,
+                                                                     partial),
+                                device_ids, max_workers=max_workers,
+                                rate_limit=rate_limit):
+            if result.ok:
+                yield result.response
+            else:
+                record = partial.pop(result.key, None) or {'DeviceId': result.key,
+                                                           'errors': {}}
+                record['errors']['all'] = str(result.error)
+                yield record
+
+    def snapshot(self, **kwargs) -> DeviceStore:
+        """Loads all devices of a search into an indexed DeviceStore.
+
+        Args:
+            **kwargs: Arguments of DeviceStore.load (search, page_size,
+                hash_fields, sorted_fields) and search filters
+
+        Returns:
+            DeviceStore: Local store to filter devices without API calls
+        """
+        return DeviceStore.load(self, **kwargs)
+
+    def iter_extensive_search(self, settings=None, **kwargs):
+        """Yields the devices of extensive_search over all pages.
+
+        Page size and timeout adapt to the observed response times and
+        sizes (see AdaptivePager). With settings the learned values are
+        reused by the next search.
+
+        Args:
+            settings (PagerSettings, optional): Learned page size and timeout
+                to start from, updated after the search. Defaults to None.
+            **kwargs: AdaptivePager arguments (page_size, target_latency,
+                max_page_bytes, ...) and extensive_search filters
+        """
+        pager_args = {key: kwargs.pop(key) for key in PAGER_ARGS if key in kwargs}
+        pager = AdaptivePager(self.extensive_search, items_key='Devices',
+                              client=self.client, settings=settings,
+                              endpoint='mdm/devices/extensivesearch', **pager_args)
+        return pager.iter_records(**kwargs)
+
+    def extensive_search_raw(self, **kwargs) -> bytes:
+        """Returns the undecoded response body of extensive_search."""
+        return MDM._get(self, path='/devices/extensivesearch', params=kwargs, raw=True)
+
+    def extensive_search_pipeline(self, transform=None, page_size: int = 500,
+                                  max_workers: int = None, max_pending: int = None,
+                                  executor=None, **kwargs):
+        """Page through extensive_search and process the pages on a process pool.
+
+        Raw pages are handed to worker processes that decode them and apply
+        transform to their records, while further pages are downloaded.
+
+        Args:
+            transform (callable, optional): Picklable function taking the list
+                of device records of a page. Defaults to None.
+            page_size (int, optional): Records per page. Defaults to 500.
+            max_workers (int, optional): Worker processes. Defaults to the CPU count.
+            max_pending (int, optional): Pages fetched ahead. Defaults to 2 * workers.
+            executor (Executor, optional): Existing executor. Defaults to None.
+            **kwargs: Filters of extensive_search
+
+        Yields:
+            The transform result of every page in page order
+        """
+        return iter_processed_pages(self.extensive_search_raw, transform=transform,
+                                    page_size=page_size, items_key='Devices',
+                                    max_workers=max_workers, max_pending=max_pending,
+                                    executor=executor, **kwargs)
+
+    def crawl(self, root_og_id, platforms=None, **kwargs):
+        """Crawl all devices below an OG in concurrent shards.
+
+        The fleet is split into disjoint OG subtrees below root_og_id and
+        by platform, every shard pages with an adaptive page size and its
+        own timeout, and the records are deduplicated by DeviceID.
+
+        Args:
+            root_og_id (int): OG ID of the crawled tree
+            platforms (list, optional): Platforms to split the shards by.
+                Defaults to None.
+            **kwargs: Arguments of FleetCrawler (max_workers, page_size,
+                timeout, shard_deadline) and extensive_search filters
+
+        Yields:
+            dict: Every device record once
+        """
+        return FleetCrawler(self.client, root_og_id, platforms=platforms, **kwargs).crawl()
+
     def get_details_by_alt_id(self, serialnumber=None, macaddress=None,
                               udid=None, imeinumber=None, easid=None):
         """Returns the Device information matching the search parameters."""
@@ -160,17 +347,86 @@ class Devices(MDM):
         _params = 'searchby={}&id={}'.format(searchby, alternate_id)
         return MDM._get(self, path=_path, params=_params)
 
-    def get_bulk_security_info(self, organization_group_id, user_name,
+    def get_bulk_security_info(self, organization_group_id=None, user_name=None,
                                params=None):
         """
         Processes the information like organization group ID, user name, model,
         platform, last seen, ownership, compliant status, seen since parameters
         and fetches the security information for the same.
+
+        :param organization_group_id: OrganizationGroup to be searched
+               user_name: Enrollment user name
+               params: Further filters as dict (model, platform, lastseen,
+                       ownership, compliantstatus, seensince, page, pagesize)
+        :return: API response
         """
-        _path = '/devices/securityinfosearch'
-        _query = 'organizationgroupid={}&user={}'.format(organization_group_id,
-                                                         user_name)
-        return MDM._get(self, path=_path, params=_query)
+        _query = dict(params or {})
+        if organization_group_id is not None:
+            _query['organizationgroupid'] = organization_group_id
+        if user_name is not None:
+            _query['user'] = user_name
+        return self.search_security_info(**_query)
+
+    def search_security_info(self, **kwargs):
+        """
+        Returns one page of security information samples matching the
+        search parameters.
+
+        PARAMS:
+            organizationgroupid, user, model, platform, lastseen, ownership,
+            compliantstatus, seensince, page, pagesize
+        """
+        return MDM._get(self, path='/devices/securityinfosearch', params=kwargs)
+
+    @staticmethod
+    def _normalize_security_info(sample, device_id=None):
+        record = unwrap_values(sample)
+        if 'DeviceId' not in record:
+            record['DeviceId'] = record.get('Id', device_id)
+        return record
+
+    def iter_security_info(self, device_ids=None, fetch_missing: bool = False,
+                           page_size: int = 500, max_workers: int = 8,
+                           rate_limit: float = None, **kwargs):
+        """Stream the security information samples of the fleet.
+
+        Pages through the securityinfosearch endpoint with all given filters
+        and yields normalized records ({"Value": x} wrappers flattened and a
+        top level "DeviceId").
+
+        Args:
+            device_ids (iterable, optional): Only yield these devices.
+                Defaults to None (all devices of the search).
+            fetch_missing (bool, optional): Fetch devices of device_ids that were
+                not part of the search result concurrently with
+                get_security_info_by_id. Defaults to False.
+            page_size (int, optional): Records per page. Defaults to 500.
+            max_workers (int, optional): Concurrent requests for missing devices.
+                Defaults to 8.
+            rate_limit (float, optional): Maximum requests per second for
+                missing devices. Defaults to None.
+            **kwargs: Filters of search_security_info
+
+        Yields:
+            dict: Normalized security information per device
+        """
+        wanted = None
+        if device_ids is not None:
+            wanted = {str(device_id) for device_id in device_ids}
+        for sample in iter_records(self.search_security_info,
+                                   page_size=page_size, **kwargs):
+            record = self._normalize_security_info(sample)
+            if wanted is not None:
+                if str(record['DeviceId']) not in wanted:
+                    continue
+                wanted.discard(str(record['DeviceId']))
+            yield record
+        if not fetch_missing or not wanted:
+            return
+        for result in iter_bulk(self.get_security_info_by_id, sorted(wanted),
+                                max_workers=max_workers, rate_limit=rate_limit):
+            if result.ok and isinstance(result.response, dict):
+                yield self._normalize_security_info(result.response, result.key)
 
     def switch_device_from_staging_to_user(self, device_id, user_id):
         """
@@ -179,6 +435,62 @@ class Devices(MDM):
         _path = "/devices/{}/enrollmentuser/{}".format(device_id, user_id)
         return MDM._patch(self, path=_path)
 
+    def bulk_switch_staging_to_user(self, assignments, by: str = 'serial',
+                                    max_workers: int = 8, rate_limit: float = None,
+                                    directory=None, **kwargs) -> list:
+        """Hand over many staged devices to their users.
+
+        Users are resolved through a UserDirectory (one paginated pass over
+        Users.search) and serial numbers with one bulk device lookup, then
+        the staging switch PATCHes run concurrently.
+
+        Args:
+            assignments (iterable): (device, user) pairs. The device is a
+                serial number or DeviceID (see by), the user a username,
+                email or user UUID.
+            by (str, optional): Kind of the device keys [serial, id].
+                Defaults to 'serial'.
+            max_workers (int, optional): Concurrent requests. Defaults to 8.
+            rate_limit (float, optional): Maximum requests per second. Defaults to None.
+            directory (UserDirectory, optional): Loaded directory to reuse
+                between calls. Defaults to None (a new one is loaded).
+            **kwargs: Users.search filters limiting the user lookup,
+                e.g. organizationgroupid
+
+        Returns:
+            list: Outcome per pair in input order, e.g.
+                {"device": "C02X", "user": "jdoe", "DeviceId": 1, "UserId": 5,
+                 "ok": True, "error": None}
+        """
+        if by not in ('serial', 'id'):
+            raise ValueError('Unknown device key kind {}, expected serial or id'.format(by))
+        assignments = [(device, user) for device, user in assignments]
+        if by == 'serial':
+            devices = self.resolve_serials([device for device, _ in assignments])
+        else:
+            devices = {str(device): int(device) for device, _ in assignments
+                       if str(device).isdigit()}
+        users = self.client.users.resolve_ids({user for _, user in assignments},
+                                              directory=directory, **kwargs)
+        report = []
+        for device, user in assignments:
+            device_id = devices.get(str(device))
+            report.append({'device': device, 'user': user, 'DeviceId': device_id,
+                           'UserId': users.get(user), 'ok': False, 'error': None})
+
+        def _switch(entry):
+            if entry['DeviceId'] is None:
+                raise ValueError('No device found for {}'.format(entry['device']))
+            if entry['UserId'] is None:
+                raise ValueError('No user found for {}'.format(entry['user']))
+            return self.switch_device_from_staging_to_user(entry['DeviceId'], entry['UserId'])
+
+        for entry, result in zip(report, run_bulk(_switch, report, max_workers=max_workers,
+                                                  rate_limit=rate_limit)):
+            entry['ok'] = result.ok
+            entry['error'] = str(result.error) if result.error is not None else None
+        return report
+
     def get_managed_admin_account_by_uuid(self, device_id):
         """
         Get information of the administrator account configured on a macOS
@@ -197,18 +509,33 @@ class Devices(MDM):
         """
         return MDM._delete(self, path='/devices/{}'.format(device_id))
 
+    @staticmethod
+    def _custom_attribute_payload(custom_attributes):
+        """
+        Builds the CustomAttributes payload from a comma separated string,
+        a list of names or a dict of name/value pairs.
+        """
+        if isinstance(custom_attributes, str):
+            custom_attributes = [item.strip() for item in custom_attributes.split(",")
+                                 if item.strip()]
+        if isinstance(custom_attributes, dict):
+            items = [{"Name": name, "Value": value}
+                     for name, value in custom_attributes.items()]
+        else:
+            items = [{"Name": name} for name in custom_attributes]
+        return {"CustomAttributes": items}
+
     def delete_customattribute_by_id(self, device_id, custom_attributes):
         """
         Delete a device customattribute.
 
         :param device_id: The device ID
                customAttributes: The attributes to remove separated by a comma
+                                 or as a list of names
         :return: API response
         """
         _path = "/devices/{}/customattributes".format(device_id)
-        _data = {"CustomAttributes": []}
-        for item in custom_attributes.split(","):
-            _data["CustomAttributes"].append({"Name": item})
+        _data = self._custom_attribute_payload(custom_attributes)
         return MDM._delete(self, path=_path, json=_data)
 
     def delete_customattribute_by_alt_id(self, serialnumber, custom_attributes):
@@ -219,15 +546,140 @@ class Devices(MDM):
 
         :param device_id: The device ID
                customAttributes: The attributes to remove separated by a comma
+                                 or as a list of names
         :return: API response
         """
         _path = "/devices/serialnumber/{}/customattributes".format(
             serialnumber)
-        _data = {"CustomAttributes": []}
-        for item in custom_attributes.split(","):
-            _data["CustomAttributes"].append({"Name": item})
+        _data = self._custom_attribute_payload(custom_attributes)
         return MDM._delete(self, path=_path, json=_data)
 
+    def set_customattribute_by_id(self, device_id, custom_attributes: dict):
+        """
+        Create or update custom attributes of a device.
+
+        :param device_id: The device ID
+               custom_attributes: Dict of attribute names and values
+        :return: API response
+        """
+        _path = "/devices/{}/customattributes".format(device_id)
+        _data = self._custom_attribute_payload(custom_attributes)
+        return MDM._put(self, path=_path, json=_data)
+
+    def get_details_by_alt_ids(self, values, searchby='Serialnumber'):
+        """
+        Returns the details of many devices in a single request.
+
+        Args:
+            values (list): Alternate IDs of the devices (e.g. serial numbers)
+            searchby (str, optional): Type of the alternate ID
+                [Macaddress, Udid, Serialnumber, ImeiNumber, EasId].
+                Defaults to 'Serialnumber'.
+
+        Returns:
+            dict: API response with the list of matching Devices
+        """
+        _data = {"BulkValues": {"Value": [str(value) for value in values]}}
+        return MDM._post(self, path='/devices', params={'searchby': searchby},
+                         json=_data)
+
+    def resolve_serials(self, serialnumbers, chunk_size: int = 500) -> dict:
+        """Resolve many serial numbers to DeviceIDs in one lookup pass.
+
+        The serial numbers are looked up in chunks with the bulk device
+        endpoint instead of one search per device.
+
+        Args:
+            serialnumbers (iterable): Serial numbers to resolve
+            chunk_size (int, optional): Serial numbers per request. Defaults to 500.
+
+        Returns:
+            dict: Serial number -> DeviceID for every serial number found
+        """
+        serials = list(dict.fromkeys(str(serial) for serial in serialnumbers))
+        resolved = {}
+        for start in range(0, len(serials), chunk_size):
+            response = self.get_details_by_alt_ids(serials[start:start + chunk_size])
+            if not isinstance(response, dict):
+                continue
+            for device in response.get('Devices', []):
+                device_id = device.get('Id', {}).get('Value')
+                if device.get('SerialNumber') and device_id is not None:
+                    resolved[device['SerialNumber']] = device_id
+        return resolved
+
+    def _bulk_device_ids(self, device_ids, serialnumbers):
+        """
+        Returns (key, DeviceID) pairs for the given IDs and serial numbers.
+        Unknown serial numbers are paired with None.
+        """
+        # Read twice below, so generators are materialized first
+        serialnumbers = list(serialnumbers or [])
+        pairs = [(device_id, device_id) for device_id in device_ids or []]
+        if serialnumbers:
+            resolved = self.resolve_serials(serialnumbers)
+            pairs.extend((serial, resolved.get(str(serial)))
+                         for serial in serialnumbers)
+        return pairs
+
+    def _run_bulk_by_device(self, func, device_ids, serialnumbers,
+                            max_workers, rate_limit):
+        pairs = self._bulk_device_ids(device_ids, serialnumbers)
+
+        def _apply(pair):
+            if pair[1] is None:
+                raise ValueError('No device found for {}'.format(pair[0]))
+            return func(pair[1])
+
+        results = run_bulk(_apply, pairs, max_workers=max_workers,
+                           rate_limit=rate_limit)
+        for result in results:
+            result.key = result.key[0]
+        return results
+
+    def bulk_delete_customattributes(self, custom_attributes, device_ids=None,
+                                     serialnumbers=None, max_workers: int = 8,
+                                     rate_limit: float = None) -> list:
+        """Delete custom attributes from many devices concurrently.
+
+        Args:
+            custom_attributes (str or list): Attribute names separated by a comma
+                or as a list
+            device_ids (list, optional): DeviceIDs to clean. Defaults to None.
+            serialnumbers (list, optional): Serial numbers to clean, resolved
+                to DeviceIDs in bulk. Defaults to None.
+            max_workers (int, optional): Concurrent requests. Defaults to 8.
+            rate_limit (float, optional): Maximum requests per second. Defaults to None.
+
+        Returns:
+            list: BulkResult per device ID/serial number in the given order
+        """
+        _data = self._custom_attribute_payload(custom_attributes)
+        names = [item["Name"] for item in _data["CustomAttributes"]]
+        return self._run_bulk_by_device(
+            lambda device_id: self.delete_customattribute_by_id(device_id, names),
+            device_ids, serialnumbers, max_workers, rate_limit)
+
+    def bulk_set_customattributes(self, custom_attributes: dict, device_ids=None,
+                                  serialnumbers=None, max_workers: int = 8,
+                                  rate_limit: float = None) -> list:
+        """Create or update custom attributes on many devices concurrently.
+
+        Args:
+            custom_attributes (dict): Attribute names and values
+            device_ids (list, optional): DeviceIDs to update. Defaults to None.
+            serialnumbers (list, optional): Serial numbers to update, resolved
+                to DeviceIDs in bulk. Defaults to None.
+            max_workers (int, optional): Concurrent requests. Defaults to 8.
+            rate_limit (float, optional): Maximum requests per second. Defaults to None.
+
+        Returns:
+            list: BulkResult per device ID/serial number in the given order
+        """
+        return self._run_bulk_by_device(
+            lambda device_id: self.set_customattribute_by_id(device_id, custom_attributes),
+            device_ids, serialnumbers, max_workers, rate_limit)
+
     def search_enrollment_token(self, organization_group_uuid, **kwargs):
         """
         Returns a list of enrollment tokes that match the search criteria.
@@ -247,3 +699,90 @@ class Devices(MDM):
         """
         _path = "/groups/{}/enrollment-tokens".format(organization_group_uuid)
         return MDM._post(self, path=_path, json=registration_record)
+
+    def iter_enrollment_tokens(self, organization_group_uuid, page_size: int = 500,
+                               **kwargs):
+        """
+        Yields the enrollment tokens of an Organization Group over all pages.
+
+        :param organization_group_uuid: The Uuid of the Organization Group
+               page_size: Tokens per page
+               kwargs: Further search criteria of search_enrollment_token
+        """
+        return iter_records(
+            lambda **query: self.search_enrollment_token(organization_group_uuid, **query),
+            page_size=page_size, page_size_param='page_size', **kwargs)
+
+    def bulk_create_enrollment_tokens(self, registration_records, organization_group=None,
+                                      group_field='organization_group',
+                                      dedupe_field='serial_number', skip_existing=True,
+                                      sink=None, max_workers: int = 8,
+                                      rate_limit: float = None):
+        """Create enrollment tokens for a stream of registration records.
+
+        The Organization Group of every record is resolved to its UUID once
+        through a cached group lookup and the tokens are created concurrently.
+        Results are yielded (and written to the sink) as they complete, so
+        the generator has to be consumed for the tokens to be created.
+
+        Args:
+            registration_records (iterable): Registration records (dicts) as
+                expected by create_enrollment_token
+            organization_group (str, optional): Group ID, OG ID or UUID for
+                records without group_field. Defaults to None.
+            group_field (str, optional): Record field holding the Organization
+                Group, removed before the token is created.
+                Defaults to 'organization_group'.
+            dedupe_field (str, optional): Record field identifying a token,
+                used as result key and to skip duplicates. Defaults to 'serial_number'.
+            skip_existing (bool, optional): Skip records of which a token with the
+                same dedupe_field exists in the OG already. Defaults to True.
+            sink (Sink, optional): Sink receiving a row per result. Defaults to None.
+            max_workers (int, optional): Concurrent requests. Defaults to 8.
+            rate_limit (float, optional): Maximum requests per second. Defaults to None.
+
+        Yields:
+            BulkResult: Outcome per record, keyed by its dedupe_field value
+        """
+        existing = {}
+
+        def _existing_keys(og_uuid):
+            if og_uuid not in existing:
+                existing[og_uuid] = {token.get(dedupe_field)
+                                     for token in self.iter_enrollment_tokens(og_uuid)}
+            return existing[og_uuid]
+
+        def _jobs():
+            for record in registration_records:
+                record = dict(record)
+                group = record.pop(group_field, None) or organization_group
+                try:
+                    if group is None:
+                        raise ValueError('No Organization Group for {}'.format(record))
+                    og_uuid = self.client.groups.resolve_uuid(group)
+                    key = record.get(dedupe_field)
+                    if skip_existing and key in _existing_keys(og_uuid):
+                        continue
+                except Exception as error:  # pylint: disable=broad-except
+                    # Reported as failed result of the record by _create
+                    yield error, record
+                    continue
+                if skip_existing and key is not None:
+                    # Later duplicates in the stream are skipped as well
+                    _existing_keys(og_uuid).add(key)
+                yield og_uuid, record
+
+        def _create(job):
+            if isinstance(job[0], Exception):
+                raise job[0]
+            return self.create_enrollment_token(job[0], job[1])
+
+        for result in iter_bulk(_create, _jobs(), max_workers=max_workers,
+                                rate_limit=rate_limit):
+            og_uuid, record = result.key
+            result.key = record.get(dedupe_field)
+            if sink is not None:
+                row = result.as_dict()
+                row['organization_group_uuid'] = og_uuid if result.ok else None
+                sink.write(row)
+            yield result
@@ -19,10 +19,11 @@ class MDM(object):
         self.client = client
 
     def _get(self, module='mdm', path=None, version=None, params=None,
-             header=None):
+             header=None, raw=False, timeout=30):
         """GET requests for base mdm endpoints"""
-        return self.client.get(module=module, path=path,
-                               version=version, params=params, header=header)
+        return self.client.get(module=module, path=path, version=version,
+                               params=params, header=header, raw=raw,
+                               timeout=timeout)
 
     def _post(self, module='mdm', path=None, version=None, params=None,
               data=None, json=None, header=None):
@@ -0,0 +1,318 @@
+"""
+Module to store device inventories in a compact memory mapped file.
+
+A snapshot holds fixed width rows (one per device) plus a string table
+of deduplicated UTF-8 strings and two on-disk indexes (DeviceId and
+SerialNumber). Readers memory map the file, so any number of processes
+share the same pages and a record is only decoded when it is accessed.
+
+File layout (little endian):
+
+    header         magic, version, row count, row size and section offsets
+    schema         JSON list of [column name, type]
+    rows           row count * row size bytes
+    strings        string table referenced by (offset, length) pairs
+    id index       (DeviceId int64, row uint32) pairs sorted by DeviceId
+    serial index   row numbers (uint32) sorted by SerialNumber
+
+Column types: 'i' int64, 'f' float64, 'b' bool, 's' string,
+'j' any JSON value (stored in the string table).
+"""
+
+import bisect
+import json
+import math
+import mmap
+import os
+import struct
+
+MAGIC = b'WS1SNAP1'
+VERSION = 1
+
+_HEADER = struct.Struct('<8sIIIQQQQQ')
+_INT_NONE = -2 ** 63
+_STR_NONE = 0xFFFFFFFF
+_ID_ENTRY = struct.Struct('<qI')
+_COLUMN_FORMATS = {'i': 'q', 'f': 'd', 'b': 'b', 's': 'II', 'j': 'II'}
+
+DEFAULT_COLUMNS = (
+    ('DeviceId', 'i'),
+    ('Udid', 's'),
+    ('SerialNumber', 's'),
+    ('MacAddress', 's'),
+    ('Imei', 's'),
+    ('AssetNumber', 's'),
+    ('DeviceFriendlyName', 's'),
+    ('OrganizationGroupId', 'i'),
+    ('OrganizationGroupName', 's'),
+    ('UserName', 's'),
+    ('UserEmail', 's'),
+    ('Ownership', 's'),
+    ('Platform', 's'),
+    ('Model', 's'),
+    ('OperatingSystem', 's'),
+    ('EnrollmentStatus', 's'),
+    ('ComplianceStatus', 's'),
+    ('LastSeen', 's'),
+    ('EnrollmentDate', 's'),
+    ('CustomAttributes', 'j'),
+)
+
+
+def _row_struct(columns):
+    return struct.Struct('<' + ''.join(_COLUMN_FORMATS[kind] for _, kind in columns))
+
+
+class SnapshotWriter(object):
+    """
+    Writes device records to a snapshot file
+
+    Only the rows are buffered (a few bytes per device) next to the
+    deduplicated strings, the records themselves are not kept.
+
+    Args:
+        path (str): Path of the snapshot file
+        columns (tuple, optional): (name, type) pairs of the stored fields.
+            Defaults to DEFAULT_COLUMNS.
+    """
+
+    def __init__(self, path, columns=DEFAULT_COLUMNS):
+        for name, kind in columns:
+            if kind not in _COLUMN_FORMATS:
+                raise ValueError('Unknown type {} of column {}'.format(kind, name))
+        self.path = path
+        self.columns = tuple((name, kind) for name, kind in columns)
+        self._row = _row_struct(self.columns)
+        self._rows = bytearray()
+        self._strings = bytearray()
+        self._string_offsets = {}
+        self._ids = []
+        self._serials = []
+        self._has_serial = 'SerialNumber' in dict(self.columns)
+        self.count = 0
+
+    def _string(self, value):
+        if value is None:
+            return _STR_NONE, 0
+        encoded = value.encode('utf-8')
+        offset = self._string_offsets.get(encoded)
+        if offset is None:
+            offset = len(self._strings)
+            self._strings += encoded
+            self._string_offsets[encoded] = offset
+        return offset, len(encoded)
+
+    def write(self, record: dict):
+        """Appends a device record."""
+        device_id = record.get('DeviceId', record.get('Id'))
+        if isinstance(device_id, dict):
+            device_id = device_id.get('Value')
+        values = []
+        for name, kind in self.columns:
+            value = device_id if name == 'DeviceId' else record.get(name)
+            if isinstance(value, dict) and kind != 'j' and 'Value' in value:
+                value = value['Value']
+            if kind == 'i':
+                values.append(_INT_NONE if value is None else int(value))
+            elif kind == 'f':
+                values.append(math.nan if value is None else float(value))
+            elif kind == 'b':
+                values.append(-1 if value is None else int(bool(value)))
+            elif kind == 's':
+                values.extend(self._string(None if value is None else str(value)))
+            else:
+                values.extend(self._string(None if value is None else
+                                           json.dumps(value, separators=(',', ':'))))
+        self._rows += self._row.pack(*values)
+        if device_id is not None:
+            self._ids.append((int(device_id), self.count))
+        if self._has_serial and record.get('SerialNumber'):
+            self._serials.append((str(record['SerialNumber']), self.count))
+        self.count += 1
+
+    def extend(self, records):
+        """Appends many device records, e.g. from iter_records."""
+        for record in records:
+            self.write(record)
+
+    def close(self):
+        """Writes the snapshot file. The file is replaced atomically."""
+        schema = json.dumps([list(column) for column in self.columns]).encode('utf-8')
+        schema_offset = _HEADER.size
+        rows_offset = schema_offset + 4 + len(schema)
+        strings_offset = rows_offset + len(self._rows)
+        id_offset = strings_offset + len(self._strings)
+        self._ids.sort()
+        serial_offset = id_offset + 4 + len(self._ids) * _ID_ENTRY.size
+        self._serials.sort()
+        temp_path = '{}.tmp'.format(self.path)
+        with open(temp_path, 'wb') as snapshot:
+            snapshot.write(_HEADER.pack(MAGIC, VERSION, self.count, self._row.size,
+                                        schema_offset, rows_offset, strings_offset,
+                                        id_offset, serial_offset))
+            snapshot.write(struct.pack('<I', len(schema)))
+            snapshot.write(schema)
+            snapshot.write(self._rows)
+            snapshot.write(self._strings)
+            snapshot.write(struct.pack('<I', len(self._ids)))
+            for entry in self._ids:
+                snapshot.write(_ID_ENTRY.pack(*entry))
+            snapshot.write(struct.pack('<I', len(self._serials)))
+            snapshot.write(struct.pack('<{}I'.format(len(self._serials)),
+                                       *(row for _, row in self._serials)))
+        os.replace(temp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+
+
+def write_snapshot(path, records, columns=DEFAULT_COLUMNS) -> int:
+    """
+    Writes device records (e.g. all extensive_search records) to a snapshot.
+
+    Returns:
+        int: Number of written records
+    """
+    with SnapshotWriter(path, columns) as writer:
+        writer.extend(records)
+    return writer.count
+
+
+class Snapshot(object):
+    """
+    Memory mapped read access to a snapshot file
+
+    Args:
+        path (str): Path of the snapshot file
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as snapshot:
+            self._map = mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.count, row_size, schema_offset, self._rows_offset,
+         self._strings_offset, id_offset, serial_offset) = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError('{} is not a device snapshot'.format(path))
+        schema_size, = struct.unpack_from('<I', self._map, schema_offset)
+        schema = bytes(self._map[schema_offset + 4:schema_offset + 4 + schema_size])
+        self.columns = tuple(tuple(column) for column in json.loads(schema))
+        self._row = _row_struct(self.columns)
+        if self._row.size != row_size:
+            raise ValueError('Row size of {} does not match its schema'.format(path))
+        self._id_count, = struct.unpack_from('<I', self._map, id_offset)
+        self._id_offset = id_offset + 4
+        self._serial_count, = struct.unpack_from('<I', self._map, serial_offset)
+        self._serial_offset = serial_offset + 4
+        self._ids = _IdKeys(self)
+        self._serials = _SerialKeys(self)
+        # Position of the SerialNumber (offset, length) pair in an unpacked row
+        self._serial_field = None
+        position = 0
+        for name, kind in self.columns:
+            if name == 'SerialNumber':
+                self._serial_field = position
+            position += len(_COLUMN_FORMATS[kind])
+
+    def __len__(self):
+        return self.count
+
+    def _string(self, offset, length):
+        if offset == _STR_NONE:
+            return None
+        start = self._strings_offset + offset
+        return self._map[start:start + length].decode('utf-8')
+
+    def _unpack(self, row):
+        return self._row.unpack_from(self._map, self._rows_offset + row * self._row.size)
+
+    def __getitem__(self, row):
+        if not 0 <= row < self.count:
+            raise IndexError(row)
+        values = iter(self._unpack(row))
+        record = {}
+        for name, kind in self.columns:
+            value = next(values)
+            if kind == 'i':
+                value = None if value == _INT_NONE else value
+            elif kind == 'f':
+                value = None if math.isnan(value) else value
+            elif kind == 'b':
+                value = None if value == -1 else bool(value)
+            else:
+                value = self._string(value, next(values))
+                if kind == 'j' and value is not None:
+                    value = json.loads(value)
+            record[name] = value
+        return record
+
+    def __iter__(self):
+        for row in range(self.count):
+            yield self[row]
+
+    def get_by_id(self, device_id):
+        """Returns the record of a DeviceID or None (binary search on disk)."""
+        position = bisect.bisect_left(self._ids, int(device_id))
+        if position < self._id_count and self._ids[position] == int(device_id):
+            _, row = _ID_ENTRY.unpack_from(self._map, self._id_offset + position * _ID_ENTRY.size)
+            return self[row]
+        return None
+
+    def get_by_serial(self, serialnumber):
+        """Returns the record of a serial number or None (binary search on disk)."""
+        position = bisect.bisect_left(self._serials, str(serialnumber))
+        if position < self._serial_count and self._serials[position] == str(serialnumber):
+            return self[self._serials.row(position)]
+        return None
+
+    def close(self):
+        """Unmaps the file."""
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class _IdKeys(object):
+    """Sequence view on the DeviceIDs of the id index for bisect."""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def __len__(self):
+        return self.snapshot._id_count  # pylint: disable=protected-access
+
+    def __getitem__(self, position):
+        snapshot = self.snapshot
+        offset = snapshot._id_offset + position * _ID_ENTRY.size  # pylint: disable=protected-access
+        return _ID_ENTRY.unpack_from(snapshot._map, offset)[0]  # pylint: disable=protected-access
+
+
+class _SerialKeys(object):
+    """Sequence view on the serial numbers of the serial index for bisect."""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def __len__(self):
+        return self.snapshot._serial_count  # pylint: disable=protected-access
+
+    def row(self, position):
+        """Returns the row number at a position of the index."""
+        snapshot = self.snapshot
+        offset = snapshot._serial_offset + position * 4  # pylint: disable=protected-access
+        return struct.unpack_from('<I', snapshot._map, offset)[0]  # pylint: disable=protected-access
+
+    def __getitem__(self, position):
+        snapshot = self.snapshot
+        values = snapshot._unpack(self.row(position))  # pylint: disable=protected-access
+        field = snapshot._serial_field  # pylint: disable=protected-access
+        return snapshot._string(values[field], values[field + 1])  # pylint: disable=protected-access
@@ -0,0 +1,307 @@
+"""
+Module to query a local snapshot of devices in the WorkspaceONE /mdm context.
+
+The DeviceStore is loaded once from a paginated search and keeps hash
+indexes for equality filters and sorted indexes for range filters, so
+repeated filtering by platform, OG, status or last seen runs in process
+instead of as another API search.
+
+    store = DeviceStore.load(wso.devices)
+    stale = store.query(all_of(eq('Platform', 'Apple'),
+                               between('LastSeen', high='2024-01-01')))
+"""
+
+import bisect
+import threading
+
+from ..paging import iter_records
+from .watcher import REMOVED, device_id_of
+
+DEFAULT_HASH_FIELDS = ('Platform', 'LocationGroupId', 'EnrollmentStatus',
+                       'SerialNumber', 'ComplianceStatus', 'Model')
+DEFAULT_SORTED_FIELDS = ('LastSeen',)
+
+
+def field_value(record, field):
+    """
+    Returns the plain value of a record field, unwrapping the
+    {"Id": {"Value": x}} and {"Value": x} structures of the API.
+    """
+    value = record.get(field)
+    if isinstance(value, dict):
+        if 'Id' in value:
+            value = value['Id']
+        if isinstance(value, dict):
+            value = value.get('Value')
+    return value
+
+
+class Filter(object):
+    """
+    Base Filter class
+
+    Subclasses return the matching DeviceIDs of a store in ids().
+    Filters can be combined with & (AND) and | (OR).
+    """
+
+    def ids(self, store) -> set:
+        """Returns the DeviceIDs of store matching the filter."""
+        raise NotImplementedError
+
+    def __and__(self, other):
+        return all_of(self, other)
+
+    def __or__(self, other):
+        return any_of(self, other)
+
+
+class _Equals(Filter):
+    def __init__(self, field, values):
+        self.field = field
+        self.values = values
+
+    def ids(self, store):
+        index = store.hash_indexes.get(self.field)
+        if index is not None:
+            matches = set()
+            for value in self.values:
+                matches |= index.get(value, set())
+            return matches
+        return {device_id for device_id, record in store.records.items()
+                if field_value(record, self.field) in self.values}
+
+
+class _Between(Filter):
+    def __init__(self, field, low, high):
+        self.field = field
+        self.low = low
+        self.high = high
+
+    def ids(self, store):
+        index = store.sorted_indexes.get(self.field)
+        if index is not None:
+            keys = store.sorted_keys[self.field]
+            start = 0 if self.low is None else bisect.bisect_left(keys, self.low)
+            end = len(keys) if self.high is None else bisect.bisect_right(keys, self.high)
+            return {device_id for _, device_id in index[start:end]}
+        matches = set()
+        for device_id, record in store.records.items():
+            value = field_value(record, self.field)
+            if value is None:
+                continue
+            if self.low is not None and value < self.low:
+                continue
+            if self.high is not None and value > self.high:
+                continue
+            matches.add(device_id)
+        return matches
+
+
+class _All(Filter):
+    def __init__(self, filters):
+        self.filters = filters
+
+    def ids(self, store):
+        matches = None
+        # Smallest candidate sets first keeps the intersections cheap
+        for candidate in sorted((item.ids(store) for item in self.filters), key=len):
+            matches = candidate if matches is None else matches & candidate
+            if not matches:
+                break
+        return matches if matches is not None else set(store.records)
+
+
+class _Any(Filter):
+    def __init__(self, filters):
+        self.filters = filters
+
+    def ids(self, store):
+        matches = set()
+        for item in self.filters:
+            matches |= item.ids(store)
+        return matches
+
+
+def eq(field, value) -> Filter:
+    """Matches devices of which field equals value."""
+    return _Equals(field, (value,))
+
+
+def isin(field, values) -> Filter:
+    """Matches devices of which field is one of values."""
+    return _Equals(field, tuple(values))
+
+
+def between(field, low=None, high=None) -> Filter:
+    """Matches devices with low <= field <= high, both bounds are optional."""
+    return _Between(field, low, high)
+
+
+def all_of(*filters) -> Filter:
+    """Matches devices matching every filter (AND)."""
+    return _All(filters)
+
+
+def any_of(*filters) -> Filter:
+    """Matches devices matching at least one filter (OR)."""
+    return _Any(filters)
+
+
+class DeviceStore(object):
+    """
+    In process snapshot of device records with secondary indexes
+
+    Args:
+        hash_fields (tuple, optional): Fields with a hash index for eq/isin.
+            Defaults to DEFAULT_HASH_FIELDS.
+        sorted_fields (tuple, optional): Fields with a sorted index for between.
+            Defaults to DEFAULT_SORTED_FIELDS.
+    """
+
+    def __init__(self, hash_fields=DEFAULT_HASH_FIELDS,
+                 sorted_fields=DEFAULT_SORTED_FIELDS):
+        self.records = {}
+        self.hash_indexes = {field: {} for field in hash_fields}
+        self.sorted_indexes = {field: [] for field in sorted_fields}
+        self.sorted_keys = {field: [] for field in sorted_fields}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def load(cls, devices, search='search', page_size: int = 500, **kwargs):
+        """Builds a store from all pages of a device search.
+
+        Args:
+            devices (Devices): Devices resource of a WorkspaceOneAPI client
+            search (str, optional): Name of the search method, e.g. 'search'
+                or 'extensive_search'. Defaults to 'search'.
+            page_size (int, optional): Records per page. Defaults to 500.
+            **kwargs: hash_fields/sorted_fields of the store and search filters
+
+        Returns:
+            DeviceStore: Store holding every device of the search
+        """
+        store = cls(**{key: kwargs.pop(key) for key in ('hash_fields', 'sorted_fields')
+                       if key in kwargs})
+        store.extend(iter_records(getattr(devices, search), page_size=page_size,
+                                  items_key='Devices', **kwargs))
+        return store
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, device_id):
+        return device_id in self.records
+
+    def get(self, device_id):
+        """Returns the record of a device or None."""
+        return self.records.get(device_id)
+
+    def _index(self, device_id, record):
+        for field, index in self.hash_indexes.items():
+            index.setdefault(field_value(record, field), set()).add(device_id)
+        for field, index in self.sorted_indexes.items():
+            value = field_value(record, field)
+            if value is None:
+                continue
+            position = bisect.bisect_left(index, (value, device_id))
+            index.insert(position, (value, device_id))
+            self.sorted_keys[field].insert(position, value)
+
+    def _unindex(self, device_id, record):
+        for field, index in self.hash_indexes.items():
+            value = field_value(record, field)
+            members = index.get(value)
+            if members is not None:
+                members.discard(device_id)
+                if not members:
+                    del index[value]
+        for field, index in self.sorted_indexes.items():
+            value = field_value(record, field)
+            if value is None:
+                continue
+            position = bisect.bisect_left(index, (value, device_id))
+            if position < len(index) and index[position] == (value, device_id):
+                del index[position]
+                del self.sorted_keys[field][position]
+
+    def upsert(self, record):
+        """Adds or replaces a device record and updates the indexes."""
+        device_id = device_id_of(record)
+        if device_id is None:
+            raise ValueError('Record has no DeviceId or Id')
+        with self._lock:
+            previous = self.records.get(device_id)
+            if previous is not None:
+                self._unindex(device_id, previous)
+            self.records[device_id] = record
+            self._index(device_id, record)
+
+    def extend(self, records):
+        """
+        Adds or replaces many records. The sorted indexes are rebuilt once
+        at the end instead of inserting every record.
+        """
+        with self._lock:
+            for record in records:
+                device_id = device_id_of(record)
+                if device_id is None:
+                    raise ValueError('Record has no DeviceId or Id')
+                previous = self.records.get(device_id)
+                for field, index in self.hash_indexes.items():
+                    if previous is not None:
+                        index.get(field_value(previous, field), set()).discard(device_id)
+                    index.setdefault(field_value(record, field), set()).add(device_id)
+                self.records[device_id] = record
+            for field in self.sorted_indexes:
+                index = sorted((value, device_id) for device_id, value in
+                               ((device_id, field_value(record, field))
+                                for device_id, record in self.records.items())
+                               if value is not None)
+                self.sorted_indexes[field] = index
+                self.sorted_keys[field] = [value for value, _ in index]
+
+    def remove(self, device_id):
+        """Removes a device and its index entries."""
+        with self._lock:
+            previous = self.records.pop(device_id, None)
+            if previous is not None:
+                self._unindex(device_id, previous)
+
+    def apply(self, event):
+        """Applies a DeviceEvent, e.g. as callback of a DeviceWatcher."""
+        if event.kind == REMOVED:
+            self.remove(event.device_id)
+        else:
+            self.upsert(event.record)
+
+    def ids(self, where: Filter = None) -> set:
+        """Returns the DeviceIDs matching the filter (all without filter)."""
+        with self._lock:
+            if where is None:
+                return set(self.records)
+            return where.ids(self)
+
+    def query(self, where: Filter = None, limit: int = None) -> list:
+        """
+        Returns the records matching the filter.
+
+        Args:
+            where (Filter, optional): Filter built with eq, isin, between,
+                all_of and any_of. Defaults to None (all devices).
+            limit (int, optional): Maximum number of records. Defaults to None.
+
+        Returns:
+            list: Matching device records
+        """
+        with self._lock:
+            matches = self.ids(where)
+            records = []
+            for device_id in matches:
+                if limit is not None and len(records) >= limit:
+                    break
+                records.append(self.records[device_id])
+            return records
+
+    def count(self, where: Filter = None) -> int:
+        """Returns the number of devices matching the filter."""
+        return len(self.ids(where))
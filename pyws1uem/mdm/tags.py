@@ -3,6 +3,7 @@ Module to manage device tags (add and remove)
 """
 
 from .mdm import MDM
+from ..bulk import iter_bulk_batches
 
 
 class Tags(MDM):
@@ -58,6 +59,70 @@ class Tags(MDM):
         response = MDM._post(self, path=path, json=device_to_add)
         return response
 
+    def add_devices(self, tag_id: str, device_ids):
+        """Add a tag to several devices with one request
+
+        Args:
+            tag_id (string): The ID of the Tag in WorkspaceOneUEM
+            device_ids (list): The IDs of the Devices in WorkspaceOneUEM
+
+        Returns:
+            json: API bulk response (AcceptedItems, FailedItems, Faults)
+        """
+        path = f'/tags/{tag_id}/adddevices'
+        devices = {"BulkValues": {"Value": [str(device_id) for device_id in device_ids]}}
+        return MDM._post(self, path=path, json=devices)
+
+    def remove_devices(self, tag_id: str, device_ids):
+        """Remove a tag from several devices with one request
+
+        Args:
+            tag_id (string): The ID of the Tag in WorkspaceOneUEM
+            device_ids (list): The IDs of the Devices in WorkspaceOneUEM
+
+        Returns:
+            json: API bulk response (AcceptedItems, FailedItems, Faults)
+        """
+        path = f'/tags/{tag_id}/removedevices'
+        devices = {"BulkValues": {"Value": [str(device_id) for device_id in device_ids]}}
+        return MDM._post(self, path=path, json=devices)
+
+    def bulk_add_devices(self, tag_id: str, device_ids, batch_size: int = 500,
+                         max_workers: int = 4, rate_limit: float = None):
+        """Add a tag to thousands of devices in concurrent batches
+
+        Args:
+            tag_id (string): The ID of the Tag in WorkspaceOneUEM
+            device_ids (iterable): The IDs of the Devices, may be lazy
+            batch_size (int, optional): Devices per request. Defaults to 500.
+            max_workers (int, optional): Concurrent requests. Defaults to 4.
+            rate_limit (float, optional): Maximum requests per second. Defaults to None.
+
+        Yields:
+            BulkResult: Outcome per device ID
+        """
+        return iter_bulk_batches(lambda ids: self.add_devices(tag_id, ids), device_ids,
+                                 batch_size=batch_size, max_workers=max_workers,
+                                 rate_limit=rate_limit)
+
+    def bulk_remove_devices(self, tag_id: str, device_ids, batch_size: int = 500,
+                            max_workers: int = 4, rate_limit: float = None):
+        """Remove a tag from thousands of devices in concurrent batches
+
+        Args:
+            tag_id (string): The ID of the Tag in WorkspaceOneUEM
+            device_ids (iterable): The IDs of the Devices, may be lazy
+            batch_size (int, optional): Devices per request. Defaults to 500.
+            max_workers (int, optional): Concurrent requests. Defaults to 4.
+            rate_limit (float, optional): Maximum requests per second. Defaults to None.
+
+        Yields:
+            BulkResult: Outcome per device ID
+        """
+        return iter_bulk_batches(lambda ids: self.remove_devices(tag_id, ids), device_ids,
+                                 batch_size=batch_size, max_workers=max_workers,
+                                 rate_limit=rate_limit)
+
     def check_device_tag(self, tag_id: str, device_id: str = None, device_uuid: str = None) -> bool:
         """Get a list of devices for the given tags and check
         if a specific device, defined by it's UUID, has the tag already assigned
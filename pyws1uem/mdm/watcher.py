@@ -0,0 +1,238 @@
+"""
+Module to watch devices for changes in the WorkspaceONE /mdm context.
+
+Instead of downloading the whole fleet on every poll, the watcher keeps a
+small fingerprint per device and only asks the API for devices seen or
+changed since the previous poll. Differences are reported as
+added/changed/removed DeviceEvents.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from ..paging import iter_records
+
+logger = logging.getLogger(__name__)
+
+ADDED = 'added'
+CHANGED = 'changed'
+REMOVED = 'removed'
+
+DEFAULT_FIELDS = (
+    'EnrollmentStatus',
+    'ComplianceStatus',
+    'CompromisedStatus',
+    'OrganizationGroupId',
+    'Platform',
+    'OperatingSystem',
+    'Model',
+    'SerialNumber',
+    'UserName',
+    'DeviceFriendlyName',
+)
+
+
+def device_id_of(record):
+    """Returns the DeviceID of a device record of any search endpoint."""
+    device_id = record.get('DeviceId')
+    if device_id is None:
+        device_id = record.get('Id')
+        if isinstance(device_id, dict):
+            device_id = device_id.get('Value')
+    return device_id
+
+
+def fingerprint(record, fields=DEFAULT_FIELDS) -> bytes:
+    """Returns a compact hash of the given fields of a device record."""
+    values = [record.get(field) for field in fields]
+    payload = json.dumps(values, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.blake2b(payload, digest_size=8).digest()
+
+
+class DeviceEvent(object):
+    """
+    A change of a single device
+
+    Attributes:
+        kind (str): 'added', 'changed' or 'removed'
+        device_id (int): DeviceID of the device
+        record (dict): Device record as returned by the API
+    """
+    __slots__ = ('kind', 'device_id', 'record')
+
+    def __init__(self, kind, device_id, record):
+        self.kind = kind
+        self.device_id = device_id
+        self.record = record
+
+    def __repr__(self):
+        return 'DeviceEvent({}, {})'.format(self.kind, self.device_id)
+
+
+class DeviceWatcher(object):
+    """
+    Polls Devices.extensive_search with time windows and emits DeviceEvents
+
+    Args:
+        devices (Devices): Devices resource of a WorkspaceOneAPI client
+        fields (tuple, optional): Record fields that make up the fingerprint.
+            Defaults to DEFAULT_FIELDS.
+        interval (int, optional): Seconds between polls in run(). Defaults to 300.
+        overlap (int, optional): Seconds each window overlaps the previous one
+            to tolerate clock skew. Defaults to 60.
+        page_size (int, optional): Records per page. Defaults to 500.
+        queue (optional): Queue receiving every event via put_nowait
+            (queue.Queue or asyncio.Queue). Defaults to None.
+        loop (optional): Event loop owning an asyncio queue. Events are
+            handed over thread safe if sent. Defaults to None.
+        **filters: Further extensive_search filters, e.g. organizationgroupid
+    """
+
+    def __init__(self, devices, fields=DEFAULT_FIELDS, interval: int = 300,
+                 overlap: int = 60, page_size: int = 500, queue=None, loop=None,
+                 **filters):
+        self.devices = devices
+        self.fields = tuple(fields)
+        self.interval = interval
+        self.overlap = overlap
+        self.page_size = page_size
+        self.queue = queue
+        self.loop = loop
+        self.filters = filters
+        self.fingerprints = {}
+        self.last_poll = None
+        self._callbacks = []
+        self._stop = threading.Event()
+
+    def subscribe(self, callback, kinds=None):
+        """
+        Registers a callback called with every DeviceEvent.
+
+        Args:
+            callback (callable): Function taking a DeviceEvent
+            kinds (iterable, optional): Only call for these event kinds.
+                Defaults to None (all kinds).
+        """
+        self._callbacks.append((callback, set(kinds) if kinds else None))
+        return callback
+
+    @staticmethod
+    def _format_time(moment):
+        return moment.strftime('%Y-%m-%dT%H:%M:%S')
+
+    def _search(self, **window):
+        query = dict(self.filters)
+        query.update(window)
+        return iter_records(self.devices.extensive_search,
+                            page_size=self.page_size, items_key='Devices', **query)
+
+    def _diff(self, record, events, updates):
+        """
+        Compares a record with the known fingerprint. New fingerprints go
+        to updates (None for removed devices) and are only kept once the
+        whole poll succeeded.
+        """
+        device_id = device_id_of(record)
+        if device_id is None:
+            return
+        previous = updates.get(device_id, self.fingerprints.get(device_id))
+        if record.get('EnrollmentStatus') == 'Unenrolled':
+            if previous is not None:
+                updates[device_id] = None
+                events.append(DeviceEvent(REMOVED, device_id, record))
+            return
+        current = fingerprint(record, self.fields)
+        if previous == current:
+            return
+        updates[device_id] = current
+        kind = ADDED if previous is None else CHANGED
+        events.append(DeviceEvent(kind, device_id, record))
+
+    def poll(self, now=None) -> list:
+        """
+        Runs a single poll and dispatches the events.
+
+        The first poll loads the full baseline and reports every device
+        as added. Later polls only request devices seen or with an
+        enrollment status change since the previous poll. If a search
+        fails, the fingerprints and the poll time stay unchanged, so the
+        next poll reports the changes again.
+
+        Returns:
+            list: DeviceEvents of this poll
+        """
+        now = now or datetime.now(timezone.utc)
+        events = []
+        updates = {}
+        if self.last_poll is None:
+            for record in self._search():
+                self._diff(record, events, updates)
+        else:
+            since = self._format_time(self.last_poll - timedelta(seconds=self.overlap))
+            seen = set()
+            windows = ({'startdatetime': since},
+                       {'statuschangestarttime': since})
+            for window in windows:
+                for record in self._search(**window):
+                    device_id = device_id_of(record)
+                    if device_id in seen:
+                        continue
+                    seen.add(device_id)
+                    self._diff(record, events, updates)
+        for device_id, current in updates.items():
+            if current is None:
+                self.fingerprints.pop(device_id, None)
+            else:
+                self.fingerprints[device_id] = current
+        self.last_poll = now
+        for event in events:
+            self._dispatch(event)
+        return events
+
+    def _dispatch(self, event):
+        for callback, kinds in self._callbacks:
+            if kinds is not None and event.kind not in kinds:
+                continue
+            try:
+                callback(event)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception('Device watcher callback failed for %r', event)
+        if self.queue is not None:
+            if self.loop is not None:
+                self.loop.call_soon_threadsafe(self.queue.put_nowait, event)
+            else:
+                self.queue.put_nowait(event)
+
+    def run(self, max_polls: int = None):
+        """
+        Polls every interval seconds until stop() is called.
+
+        Args:
+            max_polls (int, optional): Stop after this many polls. Defaults to None.
+        """
+        self._stop.clear()
+        polls = 0
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.poll()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception('Device watcher poll failed')
+            polls += 1
+            if max_polls is not None and polls >= max_polls:
+                return
+            self._stop.wait(max(0, self.interval - (time.monotonic() - started)))
+
+    def start(self):
+        """Runs the watcher in a daemon thread and returns the thread."""
+        thread = threading.Thread(target=self.run, name='DeviceWatcher', daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        """Stops run() after the current poll."""
+        self._stop.set()
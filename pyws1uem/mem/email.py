@@ -0,0 +1,86 @@
+"""
+Module to manage email (EAS) devices in the WorkspaceONE /mem context.
+"""
+
+from .mem import MEM
+from ..bulk import iter_bulk_batches
+from ..paging import iter_records
+
+ACTIONS = ('allow', 'block', 'delete', 'runcompliance')
+
+
+def _check_action(action):
+    if action not in ACTIONS:
+        raise ValueError('Unknown action {}, expected one of {}'.format(
+            action, ', '.join(ACTIONS)))
+
+
+class Email(MEM):
+    """
+    A class to manage email devices of Mobile Email Management (MEM).
+    """
+
+    def __init__(self, client):
+        MEM.__init__(self, client)
+
+    def search(self, **kwargs):
+        """Returns the EAS devices matching the search parameters.
+
+        PARAMS:
+            organizationgroupid (int, optional): OrganizationGroup to be searched
+            user (str, optional): Enrollment user name
+            easdeviceid (str, optional): EAS device identifier
+            mailboxidentity (str, optional): Mailbox of the device
+            page (int, optional): Page number, 0 based. Defaults to 0.
+            pagesize (int, optional): Records per page. Defaults to 500.
+
+        Returns:
+            dict: API page of EAS devices
+        """
+        return MEM._get(self, path='/easdevices', params=kwargs)
+
+    def iter_devices(self, page_size: int = 500, **kwargs):
+        """
+        Yields the EAS devices matching the search parameters over all pages.
+        """
+        return iter_records(self.search, page_size=page_size, **kwargs)
+
+    def apply_action(self, action: str, eas_device_ids):
+        """Apply an email action to several EAS devices with one request.
+
+        Args:
+            action (str): One of allow, block, delete, runcompliance
+            eas_device_ids (list): EAS device identifiers
+
+        Returns:
+            dict: API bulk response (AcceptedItems, FailedItems, Faults)
+        """
+        action = action.lower()
+        _check_action(action)
+        _data = {"BulkValues": {"Value": [str(eas_id) for eas_id in eas_device_ids]}}
+        return MEM._post(self, path='/email/{}'.format(action), json=_data)
+
+    def bulk_action(self, action: str, eas_device_ids, batch_size: int = 100,
+                    max_workers: int = 4, rate_limit: float = None):
+        """Apply an email action to thousands of EAS devices.
+
+        The IDs are sent in batches, batches run concurrently and the bulk
+        response of every batch is split into a result per device.
+
+        Args:
+            action (str): One of allow, block, delete, runcompliance
+            eas_device_ids (iterable): EAS device identifiers, may be lazy
+            batch_size (int, optional): Devices per request. Defaults to 100.
+            max_workers (int, optional): Concurrent requests. Defaults to 4.
+            rate_limit (float, optional): Maximum requests per second. Defaults to None.
+
+        Yields:
+            BulkResult: Outcome per EAS device ID, the fault is the error
+
+        Raises:
+            ValueError: For an unknown action, before any request is sent
+        """
+        _check_action(action)
+        return iter_bulk_batches(lambda ids: self.apply_action(action, ids),
+                                 eas_device_ids, batch_size=batch_size,
+                                 max_workers=max_workers, rate_limit=rate_limit)
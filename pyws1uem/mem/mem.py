@@ -13,7 +13,19 @@ class MEM(object):
     Through these APIs, you can retreive email management device details
     and apply compliance policies to devices.
     """
-    pass
 
+    def __init__(self, client):
+        self.client = client
 
-# TODO: Implement
+    def _get(self, module='mem', path=None, version=None, params=None,
+             header=None):
+        """GET requests for base mem endpoints"""
+        return self.client.get(module=module, path=path,
+                               version=version, params=params, header=header)
+
+    def _post(self, module='mem', path=None, version=None, params=None,
+              data=None, json=None, header=None):
+        """POST requests for base mem endpoints"""
+        return self.client.post(module=module, path=path, version=version,
+                                params=params, data=data,
+                                json=json, header=header)
@@ -0,0 +1,343 @@
+"""
+Paging Module
+--
+Generic helpers to walk through the paged search endpoints of the API.
+Search responses are dicts holding one list of records together with the
+"Page", "PageSize" and "Total" counters, e.g.
+
+    {"Devices": [...], "Page": 0, "PageSize": 500, "Total": 1234}
+"""
+
+import json
+import os
+import threading
+import time
+
+import requests
+
+# Keyword arguments of AdaptivePager that the iter_* search helpers accept
+# next to the search filters
+PAGER_ARGS = ('page_size', 'min_page_size', 'max_page_size', 'target_latency',
+              'timeout', 'min_timeout', 'max_timeout', 'timeout_factor',
+              'max_page_bytes')
+
+
+def records_of(response, items_key=None):
+    """
+    Returns the list of records of a search response.
+
+    Args:
+        response (dict): API search response
+        items_key (str, optional): Key holding the records. The first list
+            value of the response is used if not sent. Defaults to None.
+
+    Returns:
+        list: Records of the page, empty if the response has none
+    """
+    if not isinstance(response, dict):
+        return []
+    if items_key is not None:
+        return response.get(items_key) or []
+    for value in response.values():
+        if isinstance(value, list):
+            return value
+    return []
+
+
+def total_of(response):
+    """Returns the total record count of a search response or None."""
+    if not isinstance(response, dict):
+        return None
+    for key in ('Total', 'total', 'TotalResults', 'total_results'):
+        if response.get(key) is not None:
+            return int(response[key])
+    return None
+
+
+def _aligned_page_size(offset, cap):
+    """Returns the largest page size up to cap that divides offset."""
+    for size in range(cap, 0, -1):
+        if offset % size == 0:
+            return size
+    return 1
+
+
+def iter_pages(fetch, page_size: int = 500, start_page: int = 0,
+               items_key=None, page_param='page', page_size_param='pagesize',
+               **params):
+    """
+    Calls fetch for one page after another and yields the raw responses.
+
+    Paging stops on an empty page and once "Total" records were returned,
+    or on a short page for responses without "Total". A short page before
+    "Total" is reached lowers the page size to the cap of the server.
+
+    Args:
+        fetch (callable): Search method taking the query as keyword arguments,
+            e.g. client.devices.extensive_search
+        page_size (int, optional): Records per page. Defaults to 500.
+        start_page (int, optional): First page to get (0 based). Defaults to 0.
+        items_key (str, optional): Key holding the records. Defaults to None.
+        page_param (str, optional): Query parameter for the page number.
+            Defaults to 'page'.
+        page_size_param (str, optional): Query parameter for the page size.
+            Defaults to 'pagesize'.
+        **params: Search filters passed to fetch on every call
+
+    Yields:
+        dict: API response of each page
+    """
+    seen = start_page * page_size
+    while True:
+        query = dict(params)
+        query[page_param] = seen // page_size
+        query[page_size_param] = page_size
+        response = fetch(**query)
+        records = records_of(response, items_key)
+        if not records:
+            return
+        total = total_of(response)
+        if total is not None and len(records) < page_size and seen + len(records) < total:
+            # The server caps the page size, get the page again with its size
+            page_size = _aligned_page_size(seen, len(records))
+            continue
+        yield response
+        seen += len(records)
+        if (seen >= total) if total is not None else (len(records) < page_size):
+            return
+
+
+def iter_records(fetch, page_size: int = 500, start_page: int = 0,
+                 items_key=None, **params):
+    """
+    Yields the single records of all pages returned by iter_pages.
+    """
+    for response in iter_pages(fetch, page_size=page_size, start_page=start_page,
+                               items_key=items_key, **params):
+        for record in records_of(response, items_key):
+            yield record
+
+
+def unwrap_values(record):
+    """
+    Flattens the {"Value": x} wrappers the API uses for IDs,
+    e.g. {"Id": {"Value": 1}} becomes {"Id": 1}.
+    """
+    flat = {}
+    for key, value in record.items():
+        if isinstance(value, dict) and set(value) <= {'Value', 'Uuid', 'Name'} \
+                and 'Value' in value:
+            value = value['Value']
+        flat[key] = value
+    return flat
+
+
+class PagerSettings(object):
+    """
+    Learned page sizes and timeouts per endpoint, persisted as JSON
+
+    Args:
+        path (str, optional): JSON file the settings are loaded from and saved
+            to. Defaults to None (kept in memory only).
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._settings = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as settings_file:
+                    self._settings = json.load(settings_file)
+            except ValueError:
+                self._settings = {}
+
+    def get(self, endpoint) -> dict:
+        """Returns the learned settings of an endpoint (empty if unknown)."""
+        with self._lock:
+            return dict(self._settings.get(endpoint, {}))
+
+    def update(self, endpoint, **values):
+        """Stores settings of an endpoint and saves the file."""
+        with self._lock:
+            self._settings.setdefault(endpoint, {}).update(values)
+            if not self.path:
+                return
+            temp_path = '{}.tmp'.format(self.path)
+            with open(temp_path, 'w', encoding='utf-8') as settings_file:
+                json.dump(self._settings, settings_file, indent=2, sort_keys=True)
+            os.replace(temp_path, self.path)
+
+
+class AdaptivePager(object):
+    """
+    Pages through a search and adapts page size and timeout to the responses.
+
+    Pages slower than target_latency (or larger than max_page_bytes) halve
+    the page size, pages faster than half of it double it (within min/max).
+    A timed out page is retried with half the page size. The record offset
+    is kept, so no record is skipped or returned twice when the size changes.
+
+    The timeout follows the observed seconds per record: it is the predicted
+    time of the next page times timeout_factor, within min/max_timeout.
+    With settings, the learned page size, timeout and per record costs are
+    stored per endpoint and used as starting point of the next run.
+
+    Args:
+        fetch (callable): Search method taking the query and a timeout
+            keyword argument, e.g. client.devices.extensive_search
+        page_size (int, optional): Initial records per page. Defaults to 500.
+        min_page_size (int, optional): Smallest page size. Defaults to 50.
+        max_page_size (int, optional): Largest page size. Defaults to 2000.
+        target_latency (float, optional): Wanted seconds per page. Defaults to 5.
+        timeout (float, optional): Initial request timeout in seconds. Defaults to 30.
+        min_timeout (float, optional): Smallest timeout. Defaults to 10.
+        max_timeout (float, optional): Largest timeout. Defaults to 300.
+        timeout_factor (float, optional): Timeout as multiple of the predicted
+            page time. Defaults to 4.
+        max_page_bytes (int, optional): Shrink pages above this wire size.
+            Needs client. Defaults to None.
+        items_key (str, optional): Key holding the records. Defaults to None.
+        client (WorkspaceOneAPI, optional): Client the wire size of every
+            page is read from. Defaults to None.
+        settings (PagerSettings, optional): Store of learned settings. Defaults to None.
+        endpoint (str, optional): Name the settings are stored under.
+            Defaults to the qualified name of fetch.
+    """
+
+    def __init__(self, fetch, page_size: int = 500, min_page_size: int = 50,
+                 max_page_size: int = 2000, target_latency: float = 5.0,
+                 timeout: float = 30, min_timeout: float = 10,
+                 max_timeout: float = 300, timeout_factor: float = 4.0,
+                 max_page_bytes: int = None, items_key=None, page_param='page',
+                 page_size_param='pagesize', client=None, settings=None,
+                 endpoint=None):
+        self.fetch = fetch
+        self.page_size = page_size
+        self.min_page_size = min_page_size
+        self.max_page_size = max_page_size
+        self.target_latency = target_latency
+        self.timeout = timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.timeout_factor = timeout_factor
+        self.max_page_bytes = max_page_bytes
+        self.items_key = items_key
+        self.page_param = page_param
+        self.page_size_param = page_size_param
+        self.client = client
+        self.settings = settings
+        self.endpoint = endpoint or getattr(fetch, '__qualname__', repr(fetch))
+        self.seconds_per_record = None
+        self.bytes_per_record = None
+        if settings is not None:
+            learned = settings.get(self.endpoint)
+            self.page_size = min(max(int(learned.get('page_size', self.page_size)),
+                                     min_page_size), max_page_size)
+            self.timeout = learned.get('timeout', self.timeout)
+            self.seconds_per_record = learned.get('seconds_per_record')
+            self.bytes_per_record = learned.get('bytes_per_record')
+
+    def _fetch_page(self, offset, params):
+        while True:
+            query = dict(params)
+            query[self.page_param] = offset // self.page_size
+            query[self.page_size_param] = self.page_size
+            started = time.perf_counter()
+            try:
+                response = self.fetch(timeout=self.timeout, **query)
+            except requests.Timeout:
+                if not self._shrink(offset):
+                    raise
+                # The page did not make it in time, give the smaller one more
+                self.timeout = min(self.max_timeout, self.timeout * 1.5)
+                continue
+            return response, time.perf_counter() - started
+
+    def _shrink(self, offset):
+        # Page numbers are offset // page_size, so the offset has to stay
+        # a multiple of the new page size
+        smaller = self.page_size // 2
+        if smaller < self.min_page_size or offset % smaller:
+            return False
+        self.page_size = smaller
+        return True
+
+    @staticmethod
+    def _average(previous, value, weight=0.3):
+        return value if previous is None else previous + weight * (value - previous)
+
+    def _observe(self, latency, records):
+        self.seconds_per_record = self._average(self.seconds_per_record, latency / records)
+        if self.client is not None and hasattr(self.client, 'last_transfer'):
+            wire_bytes = self.client.last_transfer().get('wire_bytes_received', 0)
+            if wire_bytes:
+                self.bytes_per_record = self._average(self.bytes_per_record,
+                                                      wire_bytes / records)
+
+    def _adapt(self, latency, offset):
+        page_bytes = (self.bytes_per_record or 0) * self.page_size
+        too_large = self.max_page_bytes is not None and page_bytes > self.max_page_bytes
+        if latency > self.target_latency or too_large:
+            self._shrink(offset)
+        elif latency < self.target_latency / 2 and self.page_size * 2 <= self.max_page_size \
+                and offset % (self.page_size * 2) == 0 \
+                and (self.max_page_bytes is None or page_bytes * 2 <= self.max_page_bytes):
+            self.page_size *= 2
+        predicted = self.seconds_per_record * self.page_size
+        self.timeout = round(min(self.max_timeout,
+                                 max(self.min_timeout, predicted * self.timeout_factor)), 2)
+
+    def _save(self):
+        if self.settings is None or self.seconds_per_record is None:
+            return
+        self.settings.update(self.endpoint, page_size=self.page_size,
+                             timeout=self.timeout,
+                             seconds_per_record=self.seconds_per_record,
+                             bytes_per_record=self.bytes_per_record)
+
+    def _clamp(self, offset, cap):
+        """
+        Limits the page size to the cap of the server. The page size has
+        to divide the offset, so the next page starts exactly there.
+        """
+        self.max_page_size = cap
+        self.min_page_size = min(self.min_page_size, cap)
+        self.page_size = _aligned_page_size(offset, cap)
+
+    def iter_pages(self, **params):
+        """
+        Yields the API response of every page.
+
+        With "Total" in the responses paging stops once Total records were
+        returned. A shorter page before that means the server caps the page
+        size: the page is fetched again with the capped size.
+        """
+        offset = 0
+        try:
+            while True:
+                response, latency = self._fetch_page(offset, params)
+                records = records_of(response, self.items_key)
+                if not records:
+                    return
+                total = total_of(response)
+                if total is not None and len(records) < self.page_size \
+                        and offset + len(records) < total:
+                    # The server used its own page size for the page number,
+                    # so the records may not start at offset
+                    self._clamp(offset, len(records))
+                    continue
+                self._observe(latency, len(records))
+                yield response
+                offset += len(records)
+                if (offset >= total) if total is not None else (len(records) < self.page_size):
+                    return
+                self._adapt(latency, offset)
+        finally:
+            self._save()
+
+    def iter_records(self, **params):
+        """Yields the records of every page."""
+        for response in self.iter_pages(**params):
+            for record in records_of(response, self.items_key):
+                yield record
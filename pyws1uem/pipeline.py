@@ -0,0 +1,110 @@
+"""
+Pipeline Module
+--
+Parses and transforms raw search pages on a process pool while the next
+pages are downloaded. Decoding JSON and flattening records is CPU bound,
+so running it in worker processes lets fetching and processing overlap
+across cores.
+
+The transform is called in a worker process with the list of records of
+a page and has to be picklable (a module level function).
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .decoding import decode_json
+from .paging import records_of, total_of
+
+
+def process_page(page, transform=None, items_key=None):
+    """
+    Decodes a raw page and applies the transform to its records.
+    Runs in the worker processes. An empty body (HTTP 204 for searches
+    without results) is an empty page.
+
+    Returns:
+        tuple: (records on the page, total records of the search, result)
+    """
+    if not page:
+        return 0, None, []
+    response = decode_json(page)
+    records = records_of(response, items_key)
+    if not records:
+        return 0, total_of(response), []
+    result = transform(records) if transform is not None else records
+    return len(records), total_of(response), result
+
+
+def iter_processed_pages(fetch_raw, transform=None, page_size: int = 500,
+                         items_key=None, max_workers: int = None,
+                         max_pending: int = None, executor=None,
+                         page_param='page', page_size_param='pagesize', **params):
+    """
+    Fetches raw pages in the calling thread and processes them on a
+    process pool. Results are yielded in page order.
+
+    At most max_pending pages are fetched ahead of the consumer, so a slow
+    consumer or slow workers throttle the downloads (backpressure).
+
+    A first page shorter than page_size before "Total" is reached means the
+    server caps the page size; the following pages use the capped size.
+
+    Args:
+        fetch_raw (callable): Search method returning the raw response body,
+            e.g. client.devices.extensive_search_raw
+        transform (callable, optional): Picklable function applied to the
+            records of every page. Defaults to None (records are returned).
+        page_size (int, optional): Records per page. Defaults to 500.
+        items_key (str, optional): Key holding the records. Defaults to None.
+        max_workers (int, optional): Worker processes. Defaults to the CPU count.
+        max_pending (int, optional): Pages in flight. Defaults to 2 * workers.
+        executor (Executor, optional): Existing executor to use instead of
+            starting a ProcessPoolExecutor. Defaults to None.
+        **params: Search filters passed to fetch_raw
+
+    Yields:
+        The transform result (or the records) of each page in order
+    """
+    owned = executor is None
+    if owned:
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+    if max_pending is None:
+        max_pending = 2 * (getattr(executor, '_max_workers', None) or 4)
+    try:
+        def _submit(page):
+            query = dict(params)
+            query[page_param] = page
+            query[page_size_param] = page_size
+            return executor.submit(process_page, fetch_raw(**query), transform, items_key)
+
+        count, total, result = _submit(0).result()
+        if count == 0:
+            return
+        yield result
+        if count < page_size:
+            if total is None or count >= total:
+                return
+            # The server caps the page size: the first page is complete with
+            # the capped size, so the remaining pages are planned with it
+            page_size = count
+        pages = None if total is None else -(-total // page_size)
+        pending = deque()
+        page = 1
+        while True:
+            while len(pending) < max_pending and (pages is None or page < pages):
+                pending.append(_submit(page))
+                page += 1
+            if not pending:
+                return
+            count, _, result = pending.popleft().result()
+            if count == 0:
+                break
+            yield result
+            if count < page_size:
+                break
+        for future in pending:
+            future.cancel()
+    finally:
+        if owned:
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,252 @@
+"""
+Profiling Module
+--
+Opt-in attribution of the time WorkspaceOneAPI spends per request phase:
+
+    token            OAuth token requests (_generate_access_token), including
+                     the round trip to the token endpoint
+    build_header     header building without the token request
+    build_endpoint   URL building
+    transport        sending the request and reading the response
+    check_for_error  status handling and JSON decoding of the response
+    client           everything else inside the request methods
+                     (request body compression, transfer stats)
+
+Wall and CPU (thread) time are collected per endpoint and phase. While
+profiling is disabled the client methods are not wrapped at all, so it
+costs nothing. Time spent between requests (e.g. in callbacks processing
+the records) is the block time minus the time in the client.
+
+    with wso.profile('sync.folded'):
+        for device in wso.devices.iter_extensive_search():
+            ...
+    print(wso.profiler.format_table())
+
+Paths ending in .prof or .pstats get a cProfile dump of the block (for
+pstats, snakeviz or flameprof), other paths get folded stacks of the
+phases ("pyws1uem;endpoint;phase microseconds") for flamegraph.pl.
+"""
+
+import cProfile
+import threading
+import time
+from contextlib import contextmanager
+
+from .stats import endpoint_key
+from .transport import Transport
+
+PHASES = ('token', 'build_header', 'build_endpoint', 'transport',
+          'check_for_error', 'client')
+
+# Client method -> phase it is accounted to
+_PHASE_METHODS = (
+    ('_generate_access_token', 'token'),
+    ('_build_header', 'build_header'),
+    ('_build_endpoint', 'build_endpoint'),
+    ('_check_for_error', 'check_for_error'),
+)
+_REQUEST_METHODS = ('get', 'post', 'put', 'patch', 'delete')
+_OUTSIDE = '(outside requests)'
+
+
+class _ProfiledTransport(Transport):
+    """Times the requests of the wrapped transport as transport phase."""
+
+    def __init__(self, transport, profiler):
+        self.transport = transport
+        self.request = profiler.timed('transport', transport.request)
+
+    def close(self):
+        self.transport.close()
+
+
+class Profiler(object):
+    """
+    Per endpoint and phase timings of a WorkspaceOneAPI client
+
+    Args:
+        client (WorkspaceOneAPI): Client to profile
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.enabled = False
+        self.block_wall = 0.0
+        self.block_cpu = 0.0
+        self._timings = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._transport = None
+
+    def _record(self, endpoint, phase, wall, cpu):
+        with self._lock:
+            phases = self._timings.setdefault(endpoint, {})
+            counters = phases.get(phase)
+            if counters is None:
+                counters = phases[phase] = [0, 0.0, 0.0]
+            counters[0] += 1
+            counters[1] += wall
+            counters[2] += cpu
+
+    def timed(self, phase, func):
+        """
+        Returns func wrapped to account its time (without the time of
+        nested timed calls) to phase.
+        """
+        local = self._local
+
+        def _timed(*args, **kwargs):
+            stack = getattr(local, 'stack', None)
+            if stack is None:
+                stack = local.stack = []
+            if phase == 'transport' and stack and stack[-1][4] == 'token':
+                # The token request stays token time, not network time
+                return func(*args, **kwargs)
+            # [wall start, cpu start, nested wall, nested cpu, phase]
+            frame = [time.perf_counter(), time.thread_time(), 0.0, 0.0, phase]
+            stack.append(frame)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stack.pop()
+                wall = time.perf_counter() - frame[0]
+                cpu = time.thread_time() - frame[1]
+                if stack:
+                    stack[-1][2] += wall
+                    stack[-1][3] += cpu
+                timings = getattr(local, 'timings', None)
+                if timings is None:
+                    self._record(_OUTSIDE, phase, wall - frame[2], cpu - frame[3])
+                else:
+                    timings.append((phase, wall - frame[2], cpu - frame[3]))
+        return _timed
+
+    def _timed_request(self, method, func):
+        local = self._local
+        timed = self.timed('client', func)
+
+        def _request(*args, **kwargs):
+            if getattr(local, 'timings', None) is not None:
+                return func(*args, **kwargs)
+            local.timings = []
+            local.url = None
+            try:
+                return timed(*args, **kwargs)
+            finally:
+                timings, local.timings = local.timings, None
+                endpoint = endpoint_key(method, local.url or '/')
+                for phase, wall, cpu in timings:
+                    self._record(endpoint, phase, wall, cpu)
+        return _request
+
+    def _timed_endpoint(self, func):
+        local = self._local
+
+        def _build_endpoint(*args, **kwargs):
+            local.url = func(*args, **kwargs)
+            return local.url
+        return self.timed('build_endpoint', _build_endpoint)
+
+    def enable(self):
+        """Wraps the client methods and transport with timers."""
+        if self.enabled:
+            return
+        client = self.client
+        for name, phase in _PHASE_METHODS:
+            func = getattr(client, name)
+            if name == '_build_endpoint':
+                setattr(client, name, self._timed_endpoint(func))
+            else:
+                setattr(client, name, self.timed(phase, func))
+        for name in _REQUEST_METHODS:
+            setattr(client, name, self._timed_request(name.upper(), getattr(client, name)))
+        self._transport = client.transport
+        client.transport = _ProfiledTransport(client.transport, self)
+        self.enabled = True
+
+    def disable(self):
+        """Removes the timers, the client runs without overhead again."""
+        if not self.enabled:
+            return
+        client = self.client
+        for name, _ in _PHASE_METHODS:
+            delattr(client, name)
+        for name in _REQUEST_METHODS:
+            delattr(client, name)
+        if isinstance(client.transport, _ProfiledTransport):
+            client.transport = self._transport
+        self._transport = None
+        self.enabled = False
+
+    def reset(self):
+        """Clears all timings."""
+        with self._lock:
+            self._timings.clear()
+            self.block_wall = self.block_cpu = 0.0
+
+    @contextmanager
+    def profile(self, path=None):
+        """
+        Profiles the client calls of a with block.
+
+        Args:
+            path (str, optional): Output file, a cProfile dump for .prof and
+                .pstats paths, folded phase stacks otherwise. Defaults to None.
+        """
+        enabled = self.enabled
+        self.enable()
+        profiler = cProfile.Profile() if path and path.endswith(('.prof', '.pstats')) else None
+        started, cpu_started = time.perf_counter(), time.process_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield self
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            self.block_wall += time.perf_counter() - started
+            self.block_cpu += time.process_time() - cpu_started
+            if not enabled:
+                self.disable()
+            if profiler is not None:
+                profiler.dump_stats(path)
+            elif path:
+                self.write_folded(path)
+
+    def summary(self) -> dict:
+        """Returns {endpoint: {phase: {calls, wall, cpu}}}."""
+        with self._lock:
+            return {endpoint: {phase: {'calls': counters[0], 'wall': counters[1],
+                                       'cpu': counters[2]}
+                               for phase, counters in phases.items()}
+                    for endpoint, phases in self._timings.items()}
+
+    def format_table(self) -> str:
+        """Returns the timings as a text table, slowest endpoints first."""
+        summary = self.summary()
+        totals = {endpoint: sum(phase['wall'] for phase in phases.values())
+                  for endpoint, phases in summary.items()}
+        lines = ['{:<50} {:<16} {:>8} {:>10} {:>10} {:>6}'.format(
+            'endpoint', 'phase', 'calls', 'wall s', 'cpu s', 'wall%')]
+        for endpoint in sorted(summary, key=totals.get, reverse=True):
+            for phase in PHASES:
+                counters = summary[endpoint].get(phase)
+                if counters is None:
+                    continue
+                share = counters['wall'] / totals[endpoint] * 100 if totals[endpoint] else 0
+                lines.append('{:<50} {:<16} {:>8} {:>10.4f} {:>10.4f} {:>6.1f}'.format(
+                    endpoint[:50], phase, counters['calls'], counters['wall'],
+                    counters['cpu'], share))
+        if self.block_wall:
+            lines.append('profiled blocks: {:.4f}s wall, {:.4f}s process cpu, '
+                         '{:.4f}s wall in the client'.format(
+                             self.block_wall, self.block_cpu, sum(totals.values())))
+        return '\n'.join(lines)
+
+    def write_folded(self, path):
+        """Writes the phase timings as folded stacks for flamegraph.pl."""
+        with open(path, 'w', encoding='utf-8') as folded:
+            for endpoint, phases in sorted(self.summary().items()):
+                for phase, counters in sorted(phases.items()):
+                    folded.write('pyws1uem;{};{} {}\n'.format(
+                        endpoint, phase, int(counters['wall'] * 1e6)))
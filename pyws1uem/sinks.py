@@ -0,0 +1,119 @@
+"""
+Sinks Module
+--
+Streaming writers for bulk results and exports. Every record is written
+as soon as it arrives and flushed after flush_every records (every record
+by default), so large runs never hold all records in memory and a
+partially finished run still leaves usable output.
+"""
+
+import csv
+import json
+import sys
+
+
+class Sink(object):
+    """
+    Base Sink class
+
+    Args:
+        target (str or file): Path of the output file, '-' for stdout,
+            or an already opened text file
+        flush_every (int, optional): Flush the output after this many
+            records. Defaults to 1.
+    """
+
+    def __init__(self, target, flush_every: int = 1):
+        if hasattr(target, 'write'):
+            self._file = target
+            self._owned = False
+        elif target == '-':
+            self._file = sys.stdout
+            self._owned = False
+        else:
+            self._file = open(target, 'a', encoding='utf-8', newline='')
+            self._owned = True
+        self.flush_every = flush_every
+        self.count = 0
+
+    def write(self, record: dict):
+        """Writes a single record."""
+        raise NotImplementedError
+
+    def _written(self):
+        self.count += 1
+        if self.count % self.flush_every == 0:
+            self._file.flush()
+
+    def close(self):
+        """Flushes the output and closes it if the sink opened it."""
+        self._file.flush()
+        if self._owned:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class NDJSONSink(Sink):
+    """
+    Writes every record as a single JSON line.
+    """
+
+    def write(self, record: dict):
+        self._file.write(json.dumps(record, default=str, separators=(',', ':')))
+        self._file.write('\n')
+        self._written()
+
+
+class CSVSink(Sink):
+    """
+    Writes every record as a CSV row. Nested values are written as JSON.
+
+    Args:
+        target (str or file): See Sink
+        fieldnames (list, optional): Columns of the file. Taken from the
+            first record if not sent. Defaults to None.
+        flush_every (int, optional): See Sink
+    """
+
+    def __init__(self, target, fieldnames=None, flush_every: int = 1):
+        Sink.__init__(self, target, flush_every)
+        self.fieldnames = fieldnames
+        self._writer = None
+
+    def write(self, record: dict):
+        if self._writer is None:
+            if self.fieldnames is None:
+                self.fieldnames = list(record)
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames,
+                                          extrasaction='ignore')
+            if not self._owned or self._file.tell() == 0:
+                self._writer.writeheader()
+        row = {key: (json.dumps(value, default=str)
+                     if isinstance(value, (dict, list)) else value)
+               for key, value in record.items()}
+        self._writer.writerow(row)
+        self._written()
+
+
+def open_sink(target, output_format=None, **kwargs) -> Sink:
+    """
+    Returns a sink for the target, CSV for '.csv' files and NDJSON otherwise.
+
+    Args:
+        target (str or file): See Sink
+        output_format (str, optional): 'csv' or 'ndjson' to override the
+            file extension. Defaults to None.
+        **kwargs: Arguments of the sink (fieldnames for CSV, flush_every)
+    """
+    if output_format is None:
+        output_format = 'csv' if str(target).lower().endswith('.csv') else 'ndjson'
+    if output_format == 'csv':
+        return CSVSink(target, **kwargs)
+    if output_format in ('ndjson', 'jsonl', 'json'):
+        return NDJSONSink(target, **kwargs)
+    raise ValueError('Unknown output format {}'.format(output_format))
@@ -0,0 +1,122 @@
+"""
+Stats Module
+--
+Per endpoint accounting of the requests sent by WorkspaceOneAPI. For each
+endpoint the number of requests, the time spent and the bytes moved are
+counted, both on the wire (compressed) and after decoding, so the effect
+of compression is visible per endpoint.
+"""
+
+import re
+import threading
+
+_ID_SEGMENT = re.compile(
+    r'/(\d+|[0-9a-fA-F]{8}-([0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12})(?=/|$)')
+
+COUNTERS = ('requests', 'seconds', 'bytes_sent', 'wire_bytes_sent',
+            'wire_bytes_received', 'bytes_received')
+
+
+def endpoint_key(method, url) -> str:
+    """
+    Returns the endpoint of a request with IDs replaced by {id},
+    e.g. 'GET /api/mdm/devices/{id}/security'.
+    """
+    path = url.split('://', 1)[-1]
+    path = path[path.find('/'):] if '/' in path else '/'
+    path = path.split('?', 1)[0]
+    return '{} {}'.format(method.upper(), _ID_SEGMENT.sub('/{id}', path))
+
+
+def wire_size(response) -> int:
+    """
+    Returns the number of bytes received on the wire for a response,
+    before it was decompressed.
+    """
+    raw = getattr(response, 'raw', None)
+    tell = getattr(raw, 'tell', None)
+    if tell is not None:
+        try:
+            size = tell()
+            if size:
+                return size
+        except (OSError, ValueError):
+            pass
+    length = response.headers.get('Content-Length')
+    if length and length.isdigit():
+        return int(length)
+    return len(response.content or b'')
+
+
+class TransferStats(object):
+    """
+    Thread safe request counters per endpoint
+    """
+
+    def __init__(self):
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, seconds=0.0, bytes_sent=0, wire_bytes_sent=0,
+               wire_bytes_received=0, bytes_received=0):
+        """Adds a single request to the counters of an endpoint."""
+        with self._lock:
+            counters = self._endpoints.get(endpoint)
+            if counters is None:
+                counters = self._endpoints[endpoint] = dict.fromkeys(COUNTERS, 0)
+            counters['requests'] += 1
+            counters['seconds'] += seconds
+            counters['bytes_sent'] += bytes_sent
+            counters['wire_bytes_sent'] += wire_bytes_sent
+            counters['wire_bytes_received'] += wire_bytes_received
+            counters['bytes_received'] += bytes_received
+
+    def record_response(self, method, url, response, seconds=0.0,
+                        bytes_sent=0, wire_bytes_sent=0):
+        """
+        Adds a request and its response to the counters.
+
+        Returns:
+            dict: Counters of this single request
+        """
+        transfer = {'endpoint': endpoint_key(method, url), 'seconds': seconds,
+                    'bytes_sent': bytes_sent, 'wire_bytes_sent': wire_bytes_sent,
+                    'wire_bytes_received': wire_size(response),
+                    'bytes_received': len(response.content or b'')}
+        self.record(**transfer)
+        return transfer
+
+    def reset(self):
+        """Clears all counters."""
+        with self._lock:
+            self._endpoints.clear()
+
+    def summary(self) -> dict:
+        """Returns a copy of the counters per endpoint."""
+        with self._lock:
+            return {endpoint: dict(counters)
+                    for endpoint, counters in self._endpoints.items()}
+
+    def totals(self) -> dict:
+        """Returns the counters summed over all endpoints."""
+        totals = dict.fromkeys(COUNTERS, 0)
+        for counters in self.summary().values():
+            for name in COUNTERS:
+                totals[name] += counters[name]
+        return totals
+
+    def format_table(self) -> str:
+        """Returns the counters as a text table, largest transfers first."""
+        rows = sorted(self.summary().items(),
+                      key=lambda item: item[1]['wire_bytes_received'], reverse=True)
+        lines = ['{:<50} {:>8} {:>9} {:>12} {:>12} {:>6} {:>12} {:>12}'.format(
+            'endpoint', 'requests', 'seconds', 'wire in', 'decoded in', 'ratio',
+            'wire out', 'body out')]
+        for endpoint, counters in rows:
+            ratio = (counters['bytes_received'] / counters['wire_bytes_received']
+                     if counters['wire_bytes_received'] else 0)
+            lines.append('{:<50} {:>8} {:>9.2f} {:>12} {:>12} {:>6.1f} {:>12} {:>12}'.format(
+                endpoint[:50], counters['requests'], counters['seconds'],
+                counters['wire_bytes_received'], counters['bytes_received'], ratio,
+                counters['wire_bytes_sent'], counters['bytes_sent']))
+        return '\n'.join(lines)
@@ -0,0 +1,161 @@
+"""
+Module to resolve many enrollment users at once in WorkspaceONE UEM.
+
+The UserDirectory loads all users of a search once and keeps hash indexes
+on username, email, UUID and external ID, so joins with HR data resolve
+tens of thousands of keys without a request per user. The directory is
+reloaded once its TTL expired. UUIDs missing from the directory (or all
+UUIDs, without preloading) are fetched concurrently.
+
+    directory = wso.users.directory(organizationgroupid=570)
+    users = directory.resolve_many(['jdoe', 'anna@example.com'])
+"""
+
+import threading
+import time
+
+from ..bulk import run_bulk
+from .groups import _UUID_PATTERN
+
+# Index name -> record fields holding the key (search and v2 user spelling)
+INDEX_FIELDS = {
+    'username': ('UserName', 'userName'),
+    'email': ('Email', 'emailAddress'),
+    'uuid': ('Uuid', 'uuid'),
+    'external_id': ('ExternalId', 'externalId'),
+}
+
+
+def user_id_of(record):
+    """Returns the enrollment user ID of a user record or None."""
+    user_id = record.get('Id', record.get('id'))
+    if isinstance(user_id, dict):
+        user_id = user_id.get('Value')
+    return user_id
+
+
+def _keys_of(record, fields):
+    for field in fields:
+        value = record.get(field)
+        if value:
+            yield str(value).lower()
+
+
+class UserDirectory(object):
+    """
+    In process user directory with hash indexes and TTL refresh
+
+    Args:
+        users (Users): Users resource of a WorkspaceOneAPI client
+        ttl (float, optional): Seconds until the directory is reloaded.
+            Defaults to 900.
+        preload (bool, optional): Load all users of the search before the
+            first lookup. Without it only UUIDs are resolved, each with a
+            request. Defaults to True.
+        fetch_missing (bool, optional): Fetch UUIDs not in the directory
+            with get_user_by_uuid. Defaults to True.
+        max_workers (int, optional): Concurrent UUID lookups. Defaults to 8.
+        rate_limit (float, optional): Maximum UUID lookups per second. Defaults to None.
+        **kwargs: Users.iter_search filters and paging arguments
+    """
+
+    def __init__(self, users, ttl: float = 900, preload: bool = True,
+                 fetch_missing: bool = True, max_workers: int = 8,
+                 rate_limit: float = None, **kwargs):
+        self.users = users
+        self.ttl = ttl
+        self.preload = preload
+        self.fetch_missing = fetch_missing
+        self.max_workers = max_workers
+        self.rate_limit = rate_limit
+        self.filters = kwargs
+        self.indexes = {name: {} for name in INDEX_FIELDS}
+        self.loaded_at = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.indexes['uuid'])
+
+    def _add(self, indexes, record):
+        for name, fields in INDEX_FIELDS.items():
+            for key in _keys_of(record, fields):
+                indexes[name][key] = record
+
+    def refresh(self):
+        """Reloads all users of the search and swaps the indexes."""
+        indexes = {name: {} for name in INDEX_FIELDS}
+        for record in self.users.iter_search(**self.filters):
+            self._add(indexes, record)
+        with self._lock:
+            self.indexes = indexes
+            self.loaded_at = time.monotonic()
+
+    @property
+    def expired(self) -> bool:
+        """True before the first load and once the TTL passed."""
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > self.ttl
+
+    def _lookup(self, key, by):
+        key = str(key).lower()
+        if by is not None:
+            return self.indexes[by].get(key)
+        if _UUID_PATTERN.match(key):
+            return self.indexes['uuid'].get(key)
+        for name in ('username', 'email', 'external_id'):
+            record = self.indexes[name].get(key)
+            if record is not None:
+                return record
+        return None
+
+    def _fetch(self, uuid):
+        return self.users.get_user_by_uuid(uuid)
+
+    def resolve_many(self, keys, by: str = None) -> dict:
+        """
+        Resolves many users in one pass.
+
+        Args:
+            keys (iterable): Usernames, emails, UUIDs or external IDs
+                (case insensitive)
+            by (str, optional): Only look in one index [username, email,
+                uuid, external_id]. Defaults to None (UUIDs by UUID, other
+                keys by username, email, then external ID).
+
+        Returns:
+            dict: Key -> user record for every key found
+        """
+        if by is not None and by not in INDEX_FIELDS:
+            raise ValueError('Unknown index {}, expected one of {}'.format(
+                by, ', '.join(INDEX_FIELDS)))
+        if self.preload and self.expired:
+            self.refresh()
+        resolved = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                record = self._lookup(key, by)
+                if record is not None:
+                    resolved[key] = record
+                elif by in (None, 'uuid') and _UUID_PATTERN.match(str(key)):
+                    missing.append(key)
+        if missing and self.fetch_missing:
+            fetched = run_bulk(self._fetch, list(dict.fromkeys(missing)),
+                               max_workers=self.max_workers, rate_limit=self.rate_limit)
+            with self._lock:
+                for result in fetched:
+                    if result.ok and isinstance(result.response, dict):
+                        self._add(self.indexes, result.response)
+                for key in missing:
+                    record = self._lookup(key, 'uuid')
+                    if record is not None:
+                        resolved[key] = record
+        return resolved
+
+    def get(self, key, by: str = None):
+        """Returns the user record of a single key or None."""
+        return self.resolve_many([key], by=by).get(key)
+
+    def ids(self, keys, by: str = None) -> dict:
+        """Returns key -> enrollment user ID for every key found."""
+        return {key: user_id_of(record)
+                for key, record in self.resolve_many(keys, by=by).items()}
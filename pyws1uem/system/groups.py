@@ -3,7 +3,12 @@ Module to manage all core functionalities for WorkspaceONE UEM Organization Grou
 """
 
 import json
+import re
+import threading
 from .system import System
+from .og_tree import TreeProvisioner, load_spec
+
+_UUID_PATTERN = re.compile(r'^[0-9a-fA-F]{8}-([0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12}$')
 
 
 class Groups(System):
@@ -14,6 +19,9 @@ class Groups(System):
 
     def __init__(self, client):
         System.__init__(self, client)
+        self._uuid_cache = {}
+        self._uuid_lock = threading.Lock()
+        self._id_cache = {}
 
     def search(self, **kwargs):
         """
@@ -29,6 +37,21 @@ class Groups(System):
         response = self.search(groupid=str(groupid))
         return response['LocationGroups'][0]['Id']['Value']
 
+    def resolve_id(self, group) -> int:
+        """
+        Returns the OG ID for a Group ID (e.g. 'testog') or an OG ID.
+        Lookups are cached, so every Group ID is only searched once per client.
+        """
+        if isinstance(group, int) or str(group).isdigit():
+            return int(group)
+        with self._uuid_lock:
+            if group in self._id_cache:
+                return self._id_cache[group]
+        og_id = self.get_id_from_groupid(group)
+        with self._uuid_lock:
+            self._id_cache[group] = og_id
+        return og_id
+
     def get_groupid_from_id(self, groupid):
         """
         Returns the Group ID for a given ID
@@ -36,6 +59,13 @@ class Groups(System):
         response = System._get(self, path='/groups/{}'.format(groupid))
         return response['GroupId']
 
+    def get_children(self, og_id):
+        """
+        Returns the child OGs of a given OG ID
+        """
+        response = System._get(self, path='/groups/{}/children'.format(og_id))
+        return response if isinstance(response, list) else []
+
     def get_uuid_from_groupid(self, groupid):
         """
         Returns the OG UUID for a given Group ID
@@ -43,25 +73,43 @@ class Groups(System):
         response = System._get(self, path='/groups/{}'.format(groupid))
         return response['Uuid']
 
+    def resolve_uuid(self, group) -> str:
+        """
+        Returns the OG UUID for a Group ID (e.g. 'testog'), an OG ID or a UUID.
+        Lookups are cached, so every OG is only resolved once per client.
+        """
+        group = str(group)
+        if _UUID_PATTERN.match(group):
+            return group
+        with self._uuid_lock:
+            if group in self._uuid_cache:
+                return self._uuid_cache[group]
+        og_id = group if group.isdigit() else self.get_id_from_groupid(group)
+        uuid = self.get_uuid_from_groupid(og_id)
+        with self._uuid_lock:
+            self._uuid_cache[group] = uuid
+        return uuid
+
     def create(self, parent_id, ogdata):
         """
         Creates a Group and returns the new ID
         """
         response = System._post(self, path='/groups/{}'.format(parent_id),
-                                data=ogdata, header=self.jheader)
+                                data=ogdata, header=dict(self.jheader))
         return response
 
-    def create_customer_og(self, groupid, name=None):
+    def create_customer_og(self, groupid, name=None, parent_id=7):
         """
         Creates a Customer type OG, with a given Group ID and Name,
-        and returns the new ID
+        and returns the new ID. Customer OGs are created below the
+        Global OG, which has the ID 7 on most installations.
         """
         new_og = {'GroupId': str(groupid),
                   'Name': str(name),
                   'LocationGroupType': 'Customer'}
         if name is None:
             new_og['Name'] = str(groupid)
-        response = self.create(parent_id=7, ogdata=json.dumps(new_og))
+        response = self.create(parent_id=parent_id, ogdata=json.dumps(new_og))
         return response.get('Value')
 
     def create_child_og(self, parent_groupid, groupid, og_type=None, name=None):
@@ -69,7 +117,7 @@ class Groups(System):
         Creates a Child OG for a given Parent Group ID, with a given Type,
         Group ID, and Name, and returns the new ID
         """
-        pid = self.get_id_from_groupid(parent_groupid)
+        pid = self.resolve_id(parent_groupid)
         new_og = {'GroupId': str(groupid),
                   'Name': str(name),
                   'LocationGroupType': str(og_type)}
@@ -79,3 +127,30 @@ class Groups(System):
             new_og['LocationGroupType'] = 'Container'
         response = self.create(parent_id=pid, ogdata=json.dumps(new_og))
         return response.get('Value')
+
+    def provision_tree(self, spec, root=7, dry_run=False, max_workers=8,
+                       rate_limit=None):
+        """
+        Creates the missing OGs of a nested tree spec below a root OG.
+
+        The spec is a node dict ({"GroupId": ..., "Name": ...,
+        "LocationGroupType": ..., "children": [...]}), a list of nodes or the
+        path of a YAML/JSON file holding them. Existing OGs are matched by
+        Group ID, missing ones are created level by level with the OGs of a
+        level created concurrently.
+
+        :param spec: Tree spec or path of a spec file
+        :param root: Group ID or OG ID the top level nodes are created in.
+                     Defaults to 7 (Global).
+        :param dry_run: Only report the OGs that would be created
+        :param max_workers: OGs created at the same time. Defaults to 8.
+        :param rate_limit: Maximum requests per second. Defaults to None.
+        :return: Report entry per node ({"GroupId", "Id", "ParentId",
+                 "status", "error"}) with status exists, created, planned,
+                 failed or skipped
+        """
+        if isinstance(spec, str):
+            spec = load_spec(spec)
+        provisioner = TreeProvisioner(self, self.resolve_id(root), spec,
+                                      max_workers=max_workers, rate_limit=rate_limit)
+        return provisioner.provision(dry_run=dry_run)
@@ -0,0 +1,199 @@
+"""
+Module to provision organization group trees in WorkspaceONE UEM.
+
+A tree is described as nested nodes, as dict or YAML file:
+
+    GroupId: acme
+    Name: ACME Corp
+    LocationGroupType: Customer
+    children:
+      - GroupId: acme-de
+        children:
+          - GroupId: acme-de-sales
+      - GroupId: acme-us
+
+The spec is compared with the existing OG tree below a root OG. Missing
+OGs are created level by level, the OGs of a level concurrently. The IDs
+of the new OGs are taken from the create responses, so no OG is looked up
+after it was created.
+"""
+
+import json
+
+from ..bulk import run_bulk
+from ..paging import unwrap_values
+
+EXISTS = 'exists'
+CREATED = 'created'
+PLANNED = 'planned'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+_NODE_KEYS = {'GroupId', 'Name', 'LocationGroupType', 'children'}
+
+
+def load_spec(path):
+    """
+    Loads a tree spec from a YAML (needs PyYAML) or JSON file.
+    """
+    with open(path, 'r', encoding='utf-8') as spec_file:
+        if path.endswith(('.yml', '.yaml')):
+            try:
+                import yaml  # pylint: disable=import-outside-toplevel
+            except ImportError as error:
+                raise ImportError('Reading {} needs PyYAML (pip install pyyaml)'.format(
+                    path)) from error
+            return yaml.safe_load(spec_file)
+        return json.load(spec_file)
+
+
+class OGNode(object):
+    """
+    An organization group of a tree spec
+
+    Attributes:
+        group_id (str): Group ID of the OG
+        name (str): Name, defaults to the Group ID
+        og_type (str): LocationGroupType, defaults to 'Container'
+        children (list): Child OGNodes
+        og_id (int): OG ID once it exists (found or created)
+        parent_id (int): OG ID of the parent
+        status (str): exists, created, planned, failed or skipped
+        error (Exception): Error of a failed create
+    """
+    __slots__ = ('group_id', 'name', 'og_type', 'children', 'og_id',
+                 'parent_id', 'status', 'error')
+
+    def __init__(self, group_id, name=None, og_type=None, children=None):
+        self.group_id = str(group_id)
+        self.name = str(name) if name is not None else self.group_id
+        self.og_type = og_type or 'Container'
+        self.children = list(children or [])
+        self.og_id = None
+        self.parent_id = None
+        self.status = None
+        self.error = None
+
+    @classmethod
+    def from_spec(cls, spec):
+        """Builds the node (and its children) from a spec dict."""
+        if not isinstance(spec, dict) or 'GroupId' not in spec:
+            raise ValueError('OG spec needs a GroupId: {!r}'.format(spec))
+        unknown = set(spec) - _NODE_KEYS
+        if unknown:
+            raise ValueError('Unknown keys {} in OG spec {}'.format(
+                ', '.join(sorted(unknown)), spec['GroupId']))
+        return cls(spec['GroupId'], name=spec.get('Name'),
+                   og_type=spec.get('LocationGroupType'),
+                   children=[cls.from_spec(child) for child in spec.get('children') or []])
+
+    def payload(self) -> dict:
+        """Returns the create request body of the OG."""
+        return {'GroupId': self.group_id, 'Name': self.name,
+                'LocationGroupType': self.og_type}
+
+    def as_dict(self) -> dict:
+        """Returns the result of the node as report entry."""
+        return {'GroupId': self.group_id, 'Id': self.og_id,
+                'ParentId': self.parent_id, 'status': self.status,
+                'error': str(self.error) if self.error else None}
+
+    def __repr__(self):
+        return 'OGNode({}, {})'.format(self.group_id, self.status)
+
+
+class TreeProvisioner(object):
+    """
+    Creates the missing OGs of a tree spec below a root OG
+
+    Args:
+        groups (Groups): Groups resource of a WorkspaceOneAPI client
+        root_og_id (int): OG ID the top level nodes of the spec belong to
+        spec (dict|list): A node spec or a list of node specs
+        max_workers (int, optional): OGs created at the same time. Defaults to 8.
+        rate_limit (float, optional): Maximum requests per second. Defaults to None.
+    """
+
+    def __init__(self, groups, root_og_id, spec, max_workers: int = 8,
+                 rate_limit: float = None):
+        self.groups = groups
+        self.root_og_id = root_og_id
+        specs = spec if isinstance(spec, list) else [spec]
+        self.nodes = [OGNode.from_spec(item) for item in specs]
+        self.max_workers = max_workers
+        self.rate_limit = rate_limit
+
+    def _existing_children(self, parent_ids) -> dict:
+        """Returns {parent ID: {lower case GroupId: OG ID}} of existing OGs."""
+        existing = {}
+        for result in run_bulk(self.groups.get_children, parent_ids,
+                               max_workers=self.max_workers, rate_limit=self.rate_limit):
+            if not result.ok:
+                raise result.error
+            children = existing[result.key] = {}
+            for child in result.response:
+                child = unwrap_values(child)
+                parent = child.get('ParentLocationGroup')
+                if isinstance(parent, dict):
+                    parent = parent.get('Id', {}).get('Value')
+                # /children may list the whole subtree, keep the direct children
+                if parent is not None and str(parent) != str(result.key):
+                    continue
+                children[str(child.get('GroupId')).lower()] = child.get('Id')
+        return existing
+
+    def _create(self, node):
+        response = self.groups.create(node.parent_id, json.dumps(node.payload()))
+        return response.get('Value') if isinstance(response, dict) else response
+
+    def provision(self, dry_run: bool = False) -> list:
+        """
+        Creates the missing OGs level by level.
+
+        Children of a failed OG are skipped. With dry_run nothing is
+        created and missing OGs are reported as planned.
+
+        Returns:
+            list: Report entry (OGNode.as_dict) of every node, top down
+        """
+        for node in self.nodes:
+            node.parent_id = self.root_og_id
+        created = set()
+        level = list(self.nodes)
+        report = []
+        while level:
+            # OGs created by this run have no children to compare with yet
+            known_parents = {node.parent_id for node in level if node.status is None
+                             and node.parent_id is not None
+                             and node.parent_id not in created}
+            existing = self._existing_children(sorted(known_parents, key=str))
+            missing = []
+            for node in level:
+                if node.status == SKIPPED:
+                    continue
+                og_id = existing.get(node.parent_id, {}).get(node.group_id.lower())
+                if og_id is not None:
+                    node.og_id, node.status = og_id, EXISTS
+                elif dry_run or node.parent_id is None:
+                    node.status = PLANNED
+                else:
+                    missing.append(node)
+            for result in run_bulk(self._create, missing, max_workers=self.max_workers,
+                                   rate_limit=self.rate_limit):
+                node = result.key
+                if result.ok and result.response is not None:
+                    node.og_id, node.status = result.response, CREATED
+                    created.add(node.og_id)
+                else:
+                    node.status = FAILED
+                    node.error = result.error or ValueError('No OG ID in the response')
+            report.extend(node.as_dict() for node in level)
+            next_level = []
+            for node in level:
+                for child in node.children:
+                    child.parent_id = node.og_id
+                    if node.status in (FAILED, SKIPPED):
+                        child.status = SKIPPED
+                    next_level.append(child)
+            level = next_level
+        return report
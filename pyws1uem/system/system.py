@@ -22,12 +22,12 @@ class System(object):
         self.client = client
 
     def _get(self, module='system', path=None,
-             version=None, params=None, header=None):
+             version=None, params=None, header=None, timeout=30):
         """
         GET requests for base system endpoints
         """
-        return self.client.get(module=module, path=path,
-                               version=version, params=params, header=header)
+        return self.client.get(module=module, path=path, version=version,
+                               params=params, header=header, timeout=timeout)
 
     def _post(self, module='system', path=None,
               version=None, params=None, data=None, json=None, header=None):
@@ -2,7 +2,9 @@
 Module to manage core functionalities related to Users in WorkspaceONE UEM
 """
 
+from .directory import UserDirectory
 from .system import System
+from ..paging import PAGER_ARGS, AdaptivePager
 
 
 class Users(System):
@@ -13,7 +15,7 @@ class Users(System):
     def __init__(self, client):
         System.__init__(self, client)
 
-    def search(self, **kwargs):
+    def search(self, timeout=30, **kwargs):
         """
         Returns the Enrollment User's details matching the search parameters
 
@@ -26,8 +28,50 @@ class Users(System):
             email={email}
             organizationgroupid={locationgroupid}
             role={role}
+            page={page}
+            pagesize={pagesize}
         """
-        return System._get(self, path='/users/search', params=kwargs)
+        return System._get(self, path='/users/search', params=kwargs, timeout=timeout)
+
+    def iter_search(self, settings=None, **kwargs):
+        """
+        Yields the users matching the search parameters over all pages.
+        Page size and timeout adapt to the response times (AdaptivePager).
+
+        :param settings: PagerSettings to start from (and store) the learned
+                         page size and timeout. Defaults to None.
+        :param kwargs: Search parameters and AdaptivePager arguments
+                       (page_size, target_latency, max_page_bytes, ...)
+        """
+        pager_args = {key: kwargs.pop(key) for key in PAGER_ARGS if key in kwargs}
+        pager = AdaptivePager(self.search, items_key='Users', client=self.client,
+                              settings=settings, endpoint='system/users/search',
+                              **pager_args)
+        return pager.iter_records(**kwargs)
+
+    def directory(self, **kwargs):
+        """
+        Returns a UserDirectory resolving many users by username, email,
+        UUID or external ID from one paginated load of the user search.
+
+        :param kwargs: UserDirectory arguments (ttl, preload, fetch_missing,
+                       max_workers, rate_limit) and Users.iter_search filters
+        """
+        return UserDirectory(self, **kwargs)
+
+    def resolve_ids(self, users, directory=None, **kwargs) -> dict:
+        """
+        Resolves many usernames, emails or user UUIDs to enrollment user IDs.
+
+        :param users: Usernames, emails or UUIDs (case insensitive)
+        :param directory: Loaded UserDirectory to reuse. Defaults to a new
+                          one built with kwargs.
+        :param kwargs: UserDirectory arguments and Users.iter_search filters
+        :return: dict of user key -> user ID for every user found
+        """
+        if directory is None:
+            directory = self.directory(**kwargs)
+        return directory.ids(users)
 
     def get_user_by_uuid(self, uuid):
         """
@@ -0,0 +1,241 @@
+"""
+Transport Module
+--
+The transport sends the HTTP requests built by the WorkspaceOneAPI verb
+methods. Three transports are available:
+
+    LiveTransport    sends the requests to the API (default)
+    RecordTransport  sends the requests through another transport and
+                     appends every request/response pair to a cassette file
+    ReplayTransport  answers requests from a cassette file without network
+                     access, optionally with a simulated latency and a
+                     limit of concurrent requests
+
+A cassette is a file with one JSON object per line. Client secrets and
+access tokens are redacted before an interaction is written.
+"""
+
+import base64
+import hashlib
+import json
+import threading
+import time
+from urllib.parse import urlencode
+
+import requests
+import requests.adapters
+from requests.structures import CaseInsensitiveDict
+
+REDACTED = '***'
+_SECRET_FIELDS = ('client_secret',)
+_TOKEN_FIELDS = ('access_token',)
+
+
+class CassetteError(LookupError):
+    """Raised when a replayed request is missing from the cassette."""
+
+
+class Transport(object):
+    """
+    Base Transport class
+
+    Subclasses implement request() and return a requests.Response.
+    """
+
+    def request(self, method, url, params=None, data=None, json=None,
+                headers=None, timeout=None):
+        """Sends a request and returns the response object."""
+        raise NotImplementedError
+
+    def close(self):
+        """Releases resources held by the transport."""
+
+
+class LiveTransport(Transport):
+    """
+    Sends the requests to the API with the requests library.
+
+    A single session is shared by all calls, so connections (and their TLS
+    handshakes) are reused per host, also by concurrent bulk calls.
+
+    Args:
+        pool_size (int, optional): Connections kept open per host. Should be
+            at least the number of concurrent workers. Defaults to 32.
+    """
+
+    def __init__(self, pool_size: int = 32):
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size,
+                                                pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, method, url, params=None, data=None, json=None,
+                headers=None, timeout=None):
+        return self.session.request(method, url, params=params, data=data,
+                                    json=json, headers=headers, timeout=timeout)
+
+    def close(self):
+        self.session.close()
+
+
+def _redact_form(data):
+    if isinstance(data, dict):
+        data = {key: (REDACTED if key in _SECRET_FIELDS else value)
+                for key, value in data.items()}
+        return urlencode(sorted(data.items()))
+    return data
+
+
+def request_key(method, url, params=None, data=None, json_body=None):
+    """
+    Returns the key identifying a request in a cassette.
+
+    The key is built from the method, the full URL including the query
+    string and a hash of the body.
+    """
+    full_url = requests.Request(method.upper(), url, params=params).prepare().url
+    if json_body is not None:
+        body = json.dumps(json_body, sort_keys=True, default=str)
+    else:
+        body = _redact_form(data)
+    if body is None:
+        digest = ''
+    elif isinstance(body, (str, bytes)):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        digest = hashlib.sha1(body).hexdigest()
+    else:
+        digest = 'stream'
+    return '{} {} {}'.format(method.upper(), full_url, digest)
+
+
+def _redact_content(content):
+    try:
+        payload = json.loads(content)
+    except ValueError:
+        return content
+    if not isinstance(payload, dict) or not any(field in payload for field in _TOKEN_FIELDS):
+        return content
+    for field in _TOKEN_FIELDS:
+        if field in payload:
+            payload[field] = 'recorded-{}'.format(field)
+    return json.dumps(payload).encode('utf-8')
+
+
+def _json_line(payload):
+    return json.dumps(payload, separators=(',', ':')) + '\n'
+
+
+def _build_response(interaction, url):
+    response = requests.Response()
+    response.status_code = interaction['status']
+    response.headers = CaseInsensitiveDict(interaction.get('headers') or {})
+    if interaction.get('encoding') == 'base64':
+        response._content = base64.b64decode(interaction['content'])  # pylint: disable=protected-access
+    else:
+        response._content = interaction['content'].encode('utf-8')  # pylint: disable=protected-access
+    response.encoding = 'utf-8'
+    response.url = url
+    return response
+
+
+class RecordTransport(Transport):
+    """
+    Records every request/response pair to a cassette file.
+
+    Args:
+        cassette (str): Path of the cassette file. New interactions are appended.
+        transport (Transport, optional): Transport sending the requests.
+            Defaults to a LiveTransport.
+    """
+
+    def __init__(self, cassette, transport=None):
+        self.cassette = cassette
+        self.transport = transport or LiveTransport()
+        self._lock = threading.Lock()
+
+    def request(self, method, url, params=None, data=None, json=None,
+                headers=None, timeout=None):
+        response = self.transport.request(method, url, params=params, data=data,
+                                          json=json, headers=headers, timeout=timeout)
+        content = _redact_content(response.content)
+        interaction = {
+            'key': request_key(method, url, params, data, json),
+            'status': response.status_code,
+            'headers': {'Content-Type': response.headers.get('Content-Type', '')},
+            'elapsed': response.elapsed.total_seconds() if response.elapsed else 0,
+        }
+        try:
+            interaction['content'] = content.decode('utf-8')
+        except UnicodeDecodeError:
+            interaction['content'] = base64.b64encode(content).decode('ascii')
+            interaction['encoding'] = 'base64'
+        with self._lock:
+            with open(self.cassette, 'a', encoding='utf-8') as cassette:
+                cassette.write(_json_line(interaction))
+        return response
+
+    def close(self):
+        self.transport.close()
+
+
+class ReplayTransport(Transport):
+    """
+    Answers requests from a cassette file without network access.
+
+    Requests recorded several times are answered in the recorded order,
+    the last recorded response is repeated afterwards.
+
+    Args:
+        cassette (str): Path of the cassette file
+        latency (float or callable, optional): Seconds to wait before each
+            response. 'recorded' replays the recorded response time.
+            A callable gets the request key and returns the seconds. Defaults to 0.
+        max_concurrency (int, optional): Requests served at the same time,
+            further requests wait like on a saturated server. Defaults to None.
+    """
+
+    def __init__(self, cassette, latency=0, max_concurrency: int = None):
+        self.cassette = cassette
+        self.latency = latency
+        self.interactions = {}
+        self._positions = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        with open(cassette, 'r', encoding='utf-8') as lines:
+            for line in lines:
+                if line.strip():
+                    interaction = json.loads(line)
+                    self.interactions.setdefault(interaction['key'], []).append(interaction)
+
+    def _next(self, key):
+        with self._lock:
+            recorded = self.interactions.get(key)
+            if not recorded:
+                raise CassetteError('No recorded response for {}'.format(key))
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            return recorded[min(position, len(recorded) - 1)]
+
+    def _delay(self, key, interaction):
+        if self.latency == 'recorded':
+            return interaction.get('elapsed', 0)
+        if callable(self.latency):
+            return self.latency(key)
+        return self.latency or 0
+
+    def request(self, method, url, params=None, data=None, json=None,
+                headers=None, timeout=None):
+        key = request_key(method, url, params, data, json)
+        interaction = self._next(key)
+        if self._slots is not None:
+            self._slots.acquire()
+        try:
+            delay = self._delay(key, interaction)
+            if delay:
+                time.sleep(delay)
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+        return _build_response(interaction, key.split(' ')[1])
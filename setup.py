@@ -33,5 +33,8 @@ setup(
     ],
     python_requires='>=3.9',
     install_requires=['requests'],
+    entry_points={
+        'console_scripts': ['pyws1uem=pyws1uem.cli:main'],
+    },
     keywords='uem airwatch api',
 )
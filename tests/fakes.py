@@ -0,0 +1,107 @@
+"""
+In memory stand-ins for a Workspace ONE UEM tenant used by the tests.
+"""
+
+import json
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from pyws1uem.client import WorkspaceOneAPI
+from pyws1uem.transport import Transport
+
+AUTH_URL = 'https://auth.example.com/connect/token'
+ENV = 'https://tenant.example.com'
+
+
+def make_response(payload=None, status=200, content=None):
+    """Returns a requests.Response with a JSON payload or raw content."""
+    response = requests.Response()
+    response.status_code = status
+    response.headers = CaseInsensitiveDict()
+    if payload is not None:
+        content = json.dumps(payload).encode('utf-8')
+        response.headers['Content-Type'] = 'application/json; charset=utf-8'
+    response._content = content or b''  # pylint: disable=protected-access
+    response.encoding = 'utf-8'
+    return response
+
+
+class FakeTenant(Transport):
+    """
+    Serves the token, extensive search and OG children endpoints from memory.
+
+    Args:
+        devices (list): Device records with DeviceId, OrganizationGroupId
+            and Platform
+        parents (dict): OG ID -> parent OG ID of every OG below the root
+        max_page_size (int, optional): Page size cap of the server. Defaults to 500.
+        with_total (bool, optional): Send "Total" in search pages. Defaults to True.
+    """
+
+    def __init__(self, devices=(), parents=None, max_page_size: int = 500,
+                 with_total: bool = True):
+        self.devices = list(devices)
+        self.parents = dict(parents or {})
+        self.max_page_size = max_page_size
+        self.with_total = with_total
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def subtree(self, og_id):
+        """Returns the OG IDs of og_id and all OGs below it."""
+        ogs = {og_id}
+        changed = True
+        while changed:
+            changed = False
+            for child, parent in self.parents.items():
+                if parent in ogs and child not in ogs:
+                    ogs.add(child)
+                    changed = True
+        return ogs
+
+    def _search(self, params):
+        ogs = self.subtree(int(params.get('organizationgroupid', 0)))
+        matches = [device for device in self.devices
+                   if device['OrganizationGroupId'] in ogs
+                   and params.get('platform') in (None, device['Platform'])]
+        page = int(params.get('page', 0))
+        page_size = min(int(params.get('pagesize', 500)), self.max_page_size)
+        records = matches[page * page_size:(page + 1) * page_size]
+        if not records:
+            return make_response(status=204), 0
+        payload = {'Devices': records, 'Page': page, 'PageSize': page_size}
+        if self.with_total:
+            payload['Total'] = len(matches)
+        return make_response(payload), len(records)
+
+    def request(self, method, url, params=None, data=None, json=None,
+                headers=None, timeout=None):
+        path = urlsplit(url).path
+        params = dict(params or {})
+        records = 0
+        if path.endswith('connect/token'):
+            response = make_response({'access_token': 'secret-token', 'expires_in': 3600})
+        elif path.endswith('/devices/extensivesearch'):
+            response, records = self._search(params)
+        elif '/groups/' in path and path.endswith('/children'):
+            og_id = int(path.split('/')[-2])
+            response = make_response([
+                {'Id': {'Value': child}, 'GroupId': 'og{}'.format(child),
+                 'ParentLocationGroup': {'Id': {'Value': parent}}}
+                for child, parent in sorted(self.parents.items())
+                if child in self.subtree(og_id) and child != og_id])
+        else:
+            response = make_response(status=200)
+        with self._lock:
+            self.requests.append({'method': method, 'path': path, 'params': params,
+                                  'records': records})
+        return response
+
+
+def make_client(transport, **kwargs):
+    """Returns a WorkspaceOneAPI client sending through transport."""
+    return WorkspaceOneAPI(ENV, AUTH_URL, 'client', 'client-secret', 'tenant-code',
+                           transport=transport, **kwargs)
@@ -0,0 +1,24 @@
+import logging
+
+import pytest
+
+from pyws1uem import cli
+
+
+@pytest.fixture
+def restore_levels():
+    names = (None, 'urllib3', 'requests.packages.urllib3')
+    levels = [logging.getLogger(name).level for name in names]
+    yield
+    for name, level in zip(names, levels):
+        logging.getLogger(name).setLevel(level)
+
+
+@pytest.mark.parametrize('verbose, level', [([], logging.WARNING),
+                                            (['-v'], logging.INFO),
+                                            (['-vv'], logging.DEBUG)])
+def test_log_level(restore_levels, verbose, level):
+    args = cli.build_parser().parse_args(['export', 'devices'] + verbose)
+    cli._configure_logging(args.verbose)  # pylint: disable=protected-access
+    assert logging.getLogger().level == level
+    assert logging.getLogger('urllib3').level == level
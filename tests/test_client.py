@@ -0,0 +1,55 @@
+import json
+
+from pyws1uem.system.groups import Groups
+
+from fakes import FakeTenant, make_client
+
+
+def test_create_group_keeps_class_header():
+    tenant = FakeTenant()
+    client = make_client(tenant)
+    client.groups.create(7, '{"Name": "Branch"}')
+    assert Groups.jheader == {'Content-Type': 'application/json'}
+
+
+def test_request_does_not_change_caller_header():
+    client = make_client(FakeTenant())
+    header = {'Accept': 'application/json'}
+    client.post('system', '/groups/7', data='{}', header=header)
+    assert header == {'Accept': 'application/json'}
+
+
+class BodyTenant(FakeTenant):
+    """Tenant keeping the body arguments of every request."""
+
+    def __init__(self):
+        super().__init__()
+        self.bodies = []
+
+    def request(self, method, url, data=None, json=None, headers=None, **kwargs):
+        self.bodies.append((data, json, dict(headers or {})))
+        return super().request(method, url, data=data, json=json, headers=headers,
+                               **kwargs)
+
+
+def test_json_body_size_without_compression():
+    tenant = BodyTenant()
+    client = make_client(tenant)
+    body = {'BulkValues': {'Value': ['serial-{}'.format(i) for i in range(50)]}}
+    client.post('mdm', '/devices/commands/bulk', json=body)
+    data, sent_json, headers = tenant.bodies[-1]
+    assert sent_json is None
+    assert json.loads(data) == body
+    assert headers['Content-Type'] == 'application/json'
+    transfer = client.last_transfer()
+    assert transfer['bytes_sent'] == len(json.dumps(body).encode('utf-8'))
+    assert transfer['wire_bytes_sent'] == transfer['bytes_sent']
+
+
+def test_json_body_size_with_compression():
+    client = make_client(FakeTenant(), compress_requests_over=100)
+    body = {'BulkValues': {'Value': ['serial-{}'.format(i) for i in range(50)]}}
+    client.post('mdm', '/devices/commands/bulk', json=body)
+    transfer = client.last_transfer()
+    assert transfer['bytes_sent'] == len(json.dumps(body).encode('utf-8'))
+    assert 0 < transfer['wire_bytes_sent'] < transfer['bytes_sent']
@@ -0,0 +1,71 @@
+from pyws1uem.mdm.crawler import FleetCrawler
+
+from fakes import FakeTenant, make_client
+
+# 7 -> 8 -> 10, 7 -> 9
+PARENTS = {8: 7, 9: 7, 10: 8}
+
+
+def fleet(per_og):
+    devices = []
+    for og_id, count in per_og.items():
+        first = len(devices)
+        devices.extend({'DeviceId': first + i, 'OrganizationGroupId': og_id,
+                        'Platform': 'Apple' if i % 2 else 'Android'}
+                       for i in range(count))
+    return devices
+
+
+def fetched_records(tenant):
+    """Records of all search pages except the count probes."""
+    return sum(request['records'] for request in tenant.requests
+               if request['path'].endswith('extensivesearch')
+               and int(request['params'].get('pagesize', 500)) > 1)
+
+
+def crawl(tenant, **kwargs):
+    crawler = FleetCrawler(make_client(tenant), 7, **kwargs)
+    devices = list(crawler.crawl())
+    return crawler, sorted(device['DeviceId'] for device in devices)
+
+
+def test_root_without_own_devices_crawls_leaf_shards():
+    devices = fleet({9: 10, 10: 20})
+    tenant = FakeTenant(devices, PARENTS)
+    crawler, device_ids = crawl(tenant, page_size=5)
+    assert device_ids == list(range(30))
+    assert fetched_records(tenant) == 30
+    assert {shard.organization_group_id: shard.records for shard in crawler.shards} == \
+        {9: 10, 10: 20}
+    assert crawler.duplicates == 0
+
+
+def test_root_with_own_devices_fetches_every_device_once():
+    devices = fleet({7: 10, 8: 5, 9: 10, 10: 5})
+    tenant = FakeTenant(devices, PARENTS)
+    crawler, device_ids = crawl(tenant, page_size=4, max_workers=3)
+    assert device_ids == list(range(30))
+    assert fetched_records(tenant) == 30
+    assert [shard.pages for shard in crawler.shards] == [(0, 3), (3, 6), (6, None)]
+    assert [shard.records for shard in crawler.shards] == [12, 12, 6]
+    assert crawler.duplicates == 0
+
+
+def test_page_ranges_follow_the_server_page_size_cap():
+    devices = fleet({7: 10, 8: 30})
+    tenant = FakeTenant(devices, PARENTS, max_page_size=4)
+    crawler, device_ids = crawl(tenant, page_size=10, max_workers=4)
+    assert device_ids == list(range(40))
+    assert sum(shard.records for shard in crawler.shards) == 40
+    assert not crawler.failed_shards
+
+
+def test_platform_split_shards():
+    devices = fleet({9: 6, 10: 4})
+    tenant = FakeTenant(devices, PARENTS)
+    crawler, device_ids = crawl(tenant, platforms=['Apple', 'Android'])
+    assert device_ids == list(range(10))
+    assert fetched_records(tenant) == 10
+    assert {(shard.organization_group_id, shard.platform): shard.records
+            for shard in crawler.shards} == {(9, 'Apple'): 3, (9, 'Android'): 3,
+                                             (10, 'Apple'): 2, (10, 'Android'): 2}
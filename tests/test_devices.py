@@ -0,0 +1,104 @@
+from pyws1uem.error import RateLimitError
+
+from fakes import FakeTenant, make_client
+
+
+def test_bulk_enrollment_tokens_skip_duplicates_in_stream(monkeypatch):
+    client = make_client(FakeTenant())
+    created = []
+    monkeypatch.setattr(client.groups, 'resolve_uuid', lambda group: 'og-uuid')
+    monkeypatch.setattr(client.devices, 'iter_enrollment_tokens',
+                        lambda og_uuid: iter([{'serial_number': 'A'}]))
+    monkeypatch.setattr(client.devices, 'create_enrollment_token',
+                        lambda og_uuid, record: created.append(record['serial_number']))
+    records = [{'serial_number': serial} for serial in ('A', 'B', 'C', 'B', 'C')]
+    results = list(client.devices.bulk_create_enrollment_tokens(
+        records, organization_group='og', max_workers=2))
+    assert sorted(result.key for result in results) == ['B', 'C']
+    assert sorted(created) == ['B', 'C']
+
+
+def test_bulk_device_ids_from_generator(monkeypatch):
+    client = make_client(FakeTenant())
+    monkeypatch.setattr(client.devices, 'resolve_serials',
+                        lambda serials: {serial: index for index, serial in enumerate(serials)})
+    pairs = client.devices._bulk_device_ids(  # pylint: disable=protected-access
+        [7], (serial for serial in ('S0', 'S1')))
+    assert pairs == [(7, 7), ('S0', 0), ('S1', 1)]
+
+
+def detail_calls(monkeypatch, client, details, security):
+    calls = []
+
+    def record(kind, func):
+        def _call(key):
+            calls.append(kind)
+            return func(key)
+        return _call
+
+    monkeypatch.setattr(client.devices, 'get_details_by_device_id', record('details', details))
+    monkeypatch.setattr(client.devices, 'get_security_info_by_id', record('security', security))
+    monkeypatch.setattr(client.devices, 'get_managed_admin_account_by_uuid',
+                        record('managed_admin', lambda uuid: {'Uuid': uuid}))
+    return calls
+
+
+def test_fetch_many_retries_throttled_kinds(monkeypatch):
+    client = make_client(FakeTenant())
+    throttled = [RateLimitError(retry_after=0.01)]
+
+    def security(device_id):
+        if throttled:
+            raise throttled.pop()
+        return {'DeviceId': device_id}
+
+    calls = detail_calls(monkeypatch, client, lambda device_id: {'Uuid': 'u1'}, security)
+    records = list(client.devices.fetch_many([1]))
+    assert records == [{'DeviceId': 1, 'errors': {}, 'details': {'Uuid': 'u1'},
+                        'security': {'DeviceId': 1}, 'managed_admin': {'Uuid': 'u1'}}]
+    assert calls == ['details', 'security', 'security', 'managed_admin']
+
+
+def test_fetch_many_reuses_failed_details(monkeypatch):
+    client = make_client(FakeTenant())
+
+    def details(device_id):
+        raise ValueError('device gone')
+
+    calls = detail_calls(monkeypatch, client, details, lambda device_id: {})
+    record = next(client.devices.fetch_many([1], kinds=('details', 'managed_admin')))
+    assert record['details'] is None and record['managed_admin'] is None
+    assert record['errors'] == {'details': 'device gone',
+                                'managed_admin': 'No device details: device gone'}
+    assert calls == ['details']
+
+
+def staging_client(monkeypatch, serials):
+    client = make_client(FakeTenant())
+    switched = []
+    monkeypatch.setattr(client.devices, 'resolve_serials',
+                        lambda values: {str(value): serials[str(value)]
+                                        for value in values if str(value) in serials})
+    monkeypatch.setattr(client.users, 'resolve_ids',
+                        lambda users, directory=None, **kwargs: {'jdoe': 5})
+    monkeypatch.setattr(client.devices, 'switch_device_from_staging_to_user',
+                        lambda device_id, user_id: switched.append((device_id, user_id)))
+    return client, switched
+
+
+def test_staging_switch_numeric_serial_is_not_a_device_id(monkeypatch):
+    client, switched = staging_client(monkeypatch, {'C02X': 1})
+    report = client.devices.bulk_switch_staging_to_user([('C02X', 'jdoe'),
+                                                         ('123456', 'jdoe')])
+    assert [(entry['DeviceId'], entry['ok']) for entry in report] == [(1, True),
+                                                                      (None, False)]
+    assert report[1]['error'] == 'No device found for 123456'
+    assert switched == [(1, 5)]
+
+
+def test_staging_switch_by_device_id(monkeypatch):
+    client, switched = staging_client(monkeypatch, {})
+    report = client.devices.bulk_switch_staging_to_user([(12, 'jdoe'), ('C02X', 'jdoe')],
+                                                        by='id')
+    assert [entry['ok'] for entry in report] == [True, False]
+    assert switched == [(12, 5)]
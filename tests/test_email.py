@@ -0,0 +1,11 @@
+import pytest
+
+from fakes import FakeTenant, make_client
+
+
+def test_bulk_action_rejects_unknown_action_once():
+    tenant = FakeTenant()
+    client = make_client(tenant)
+    with pytest.raises(ValueError):
+        client.email.bulk_action('blokc', ('eas-{}'.format(i) for i in range(500)))
+    assert tenant.requests == []
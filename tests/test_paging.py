@@ -0,0 +1,41 @@
+from pyws1uem.paging import AdaptivePager, iter_records
+
+from fakes import FakeTenant, make_client
+
+
+def fleet(count, og_id=7):
+    return [{'DeviceId': i, 'OrganizationGroupId': og_id, 'Platform': 'Apple'}
+            for i in range(count)]
+
+
+def test_adaptive_pager_respects_server_page_cap():
+    tenant = FakeTenant(fleet(3000), max_page_size=500)
+    client = make_client(tenant)
+    pager = AdaptivePager(client.devices.extensive_search, items_key='Devices',
+                          target_latency=60)
+    ids = [record['DeviceId'] for record in pager.iter_records(organizationgroupid=7)]
+    assert ids == list(range(3000))
+    assert pager.page_size <= 500
+
+
+def test_iter_extensive_search_returns_all_devices():
+    tenant = FakeTenant(fleet(3000), max_page_size=500)
+    client = make_client(tenant)
+    devices = list(client.devices.iter_extensive_search(organizationgroupid=7,
+                                                        target_latency=60))
+    assert len(devices) == 3000
+    assert len({device['DeviceId'] for device in devices}) == 3000
+
+
+def test_adaptive_pager_empty_search():
+    client = make_client(FakeTenant(fleet(10)))
+    assert list(client.devices.iter_extensive_search(organizationgroupid=8)) == []
+
+
+def test_iter_records_respects_server_page_cap():
+    tenant = FakeTenant(fleet(1234), max_page_size=100)
+    client = make_client(tenant)
+    ids = [record['DeviceId'] for record in iter_records(
+        client.devices.extensive_search, page_size=500, items_key='Devices',
+        organizationgroupid=7)]
+    assert ids == list(range(1234))
@@ -0,0 +1,50 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from pyws1uem.pipeline import process_page
+
+from fakes import FakeTenant, make_client
+
+
+def device_ids(records):
+    return [record['DeviceId'] for record in records]
+
+
+def fleet(count):
+    return [{'DeviceId': i, 'OrganizationGroupId': 7, 'Platform': 'Apple'}
+            for i in range(count)]
+
+
+def test_process_page_empty_body():
+    assert process_page(b'', items_key='Devices') == (0, None, [])
+
+
+def test_pipeline_empty_search_on_process_pool():
+    client = make_client(FakeTenant(fleet(5)))
+    assert list(client.devices.extensive_search_pipeline(organizationgroupid=8,
+                                                         max_workers=1)) == []
+
+
+def test_pipeline_without_total_stops_after_last_page():
+    client = make_client(FakeTenant(fleet(25), with_total=False))
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        pages = list(client.devices.extensive_search_pipeline(
+            device_ids, page_size=10, executor=executor, max_pending=4,
+            organizationgroupid=7))
+    assert [device for page in pages for device in page] == list(range(25))
+
+
+def test_pipeline_exact_multiple_without_total():
+    client = make_client(FakeTenant(fleet(20), with_total=False))
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        pages = list(client.devices.extensive_search_pipeline(
+            device_ids, page_size=10, executor=executor, max_pending=4,
+            organizationgroupid=7))
+    assert [device for page in pages for device in page] == list(range(20))
+
+
+def test_pipeline_follows_server_page_size_cap():
+    client = make_client(FakeTenant(fleet(3000), max_page_size=500))
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        pages = list(client.devices.extensive_search_pipeline(
+            device_ids, page_size=1000, executor=executor, organizationgroupid=7))
+    assert [device for page in pages for device in page] == list(range(3000))
@@ -0,0 +1,25 @@
+import time
+
+from fakes import FakeTenant, make_client
+
+
+class SlowTokenTenant(FakeTenant):
+    """Tenant whose token endpoint answers after a delay."""
+
+    def request(self, method, url, **kwargs):
+        if url.endswith('connect/token'):
+            time.sleep(0.2)
+        return super().request(method, url, **kwargs)
+
+
+def test_token_request_is_token_time():
+    client = make_client(SlowTokenTenant())
+    with client.profile():
+        client.devices.extensive_search(organizationgroupid=7, page=0, pagesize=500)
+    phases = client.profiler.summary()
+    token = sum(endpoint.get('token', {}).get('wall', 0) for endpoint in phases.values())
+    transport = [endpoint['transport'] for endpoint in phases.values()
+                 if 'transport' in endpoint]
+    assert token >= 0.2
+    assert sum(counters['calls'] for counters in transport) == 1
+    assert sum(counters['wall'] for counters in transport) < 0.2
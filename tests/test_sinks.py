@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+from pyws1uem.sinks import CSVSink, NDJSONSink, open_sink
+
+
+def read(path):
+    with open(path, 'r', encoding='utf-8') as output:
+        return output.read()
+
+
+def test_ndjson_records_are_flushed_as_written(tmp_path):
+    path = str(tmp_path / 'results.ndjson')
+    with NDJSONSink(path) as sink:
+        sink.write({'key': 1, 'ok': True})
+        assert [json.loads(line) for line in read(path).splitlines()] == \
+            [{'key': 1, 'ok': True}]
+
+
+def test_csv_records_are_flushed_as_written(tmp_path):
+    path = str(tmp_path / 'devices.csv')
+    with CSVSink(path) as sink:
+        sink.write({'DeviceId': 1, 'Tags': ['a']})
+        assert read(path).splitlines() == ['DeviceId,Tags', '1,"[""a""]"']
+
+
+def test_flush_every(tmp_path):
+    path = str(tmp_path / 'devices.ndjson')
+    with open_sink(path, flush_every=2) as sink:
+        sink.write({'DeviceId': 1})
+        assert read(path) == ''
+        sink.write({'DeviceId': 2})
+        assert len(read(path).splitlines()) == 2
+        sink.write({'DeviceId': 3})
+    assert len(read(path).splitlines()) == 3
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        open_sink(str(tmp_path / 'devices.xml'), 'xml')
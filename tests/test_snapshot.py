@@ -0,0 +1,90 @@
+import pytest
+
+from pyws1uem.mdm.snapshot import Snapshot, SnapshotWriter, write_snapshot
+
+COLUMNS = (('DeviceId', 'i'), ('SerialNumber', 's'), ('Battery', 'f'),
+           ('Compromised', 'b'), ('Platform', 's'), ('CustomAttributes', 'j'))
+
+RECORDS = [
+    {'DeviceId': 30, 'SerialNumber': 'C02X', 'Battery': 0.5, 'Compromised': False,
+     'Platform': 'Apple', 'CustomAttributes': [{'Name': 'dept', 'Value': 'HR'}]},
+    {'Id': {'Value': 10}, 'SerialNumber': 'A1', 'Battery': 1.0, 'Compromised': True,
+     'Platform': 'Apple', 'CustomAttributes': {'nested': {'a': 1}}},
+    {'DeviceId': 20, 'SerialNumber': None, 'Battery': None, 'Compromised': None,
+     'Platform': '', 'CustomAttributes': None},
+    {'DeviceId': -5, 'SerialNumber': 'Zürich-1', 'Battery': -2.25, 'Compromised': 0,
+     'Platform': 'Android', 'CustomAttributes': 7},
+]
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    path = str(tmp_path / 'devices.snap')
+    assert write_snapshot(path, RECORDS, columns=COLUMNS) == 4
+    with Snapshot(path) as snapshot:
+        yield snapshot
+
+
+def test_round_trip_of_every_column_type(snapshot):
+    assert len(snapshot) == 4
+    assert snapshot.columns == COLUMNS
+    assert snapshot[0] == RECORDS[0]
+    expected = {name: value for name, value in RECORDS[1].items() if name != 'Id'}
+    assert snapshot[1] == dict(expected, DeviceId=10)
+    assert snapshot[3] == dict(RECORDS[3], Compromised=False)
+    assert [record['DeviceId'] for record in snapshot] == [30, 10, 20, -5]
+    with pytest.raises(IndexError):
+        snapshot[4]  # pylint: disable=pointless-statement
+
+
+def test_none_values(snapshot):
+    assert snapshot[2] == {'DeviceId': 20, 'SerialNumber': None, 'Battery': None,
+                           'Compromised': None, 'Platform': '', 'CustomAttributes': None}
+
+
+def test_get_by_id(snapshot):
+    assert snapshot.get_by_id(10)['SerialNumber'] == 'A1'
+    assert snapshot.get_by_id('30')['SerialNumber'] == 'C02X'
+    assert snapshot.get_by_id(-5)['Platform'] == 'Android'
+    assert snapshot.get_by_id(11) is None
+    assert snapshot.get_by_id(99) is None
+    assert snapshot.get_by_id(-99) is None
+
+
+def test_get_by_serial(snapshot):
+    assert snapshot.get_by_serial('C02X')['DeviceId'] == 30
+    assert snapshot.get_by_serial('Zürich-1')['DeviceId'] == -5
+    assert snapshot.get_by_serial('A1')['DeviceId'] == 10
+    assert snapshot.get_by_serial('B') is None
+    assert snapshot.get_by_serial('ZZZ') is None
+    assert snapshot.get_by_serial('') is None
+
+
+def test_empty_snapshot(tmp_path):
+    path = str(tmp_path / 'empty.snap')
+    assert write_snapshot(path, []) == 0
+    with Snapshot(path) as snapshot:
+        assert len(snapshot) == 0
+        assert list(snapshot) == []
+        assert snapshot.get_by_id(1) is None
+        assert snapshot.get_by_serial('C02X') is None
+
+
+def test_default_columns_and_missing_fields(tmp_path):
+    path = str(tmp_path / 'default.snap')
+    with SnapshotWriter(path) as writer:
+        writer.write({'DeviceId': 1, 'SerialNumber': 'S1',
+                      'LocationGroupId': {'Id': {'Value': 7}}, 'Platform': 'Apple'})
+    with Snapshot(path) as snapshot:
+        record = snapshot.get_by_serial('S1')
+    assert record['DeviceId'] == 1 and record['Platform'] == 'Apple'
+    assert record['Udid'] is None and record['OrganizationGroupId'] is None
+
+
+def test_rejects_unknown_types_and_files(tmp_path):
+    with pytest.raises(ValueError):
+        SnapshotWriter(str(tmp_path / 'bad.snap'), columns=(('DeviceId', 'x'),))
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'\0' * 128)
+    with pytest.raises(ValueError):
+        Snapshot(str(path))
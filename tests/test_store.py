@@ -0,0 +1,86 @@
+import pytest
+
+from pyws1uem.mdm.store import DeviceStore, all_of, any_of, between, eq, isin
+from pyws1uem.mdm.watcher import REMOVED, DeviceEvent
+
+from fakes import FakeTenant, make_client
+
+
+def fleet():
+    return [{'DeviceId': i, 'OrganizationGroupId': 7,
+             'Platform': 'Apple' if i % 2 else 'Android',
+             'LastSeen': '2024-01-{:02d}T00:00:00'.format(i + 1),
+             'LocationGroupId': {'Id': {'Value': 7}}} for i in range(10)]
+
+
+@pytest.fixture
+def store():
+    client = make_client(FakeTenant(fleet()))
+    return DeviceStore.load(client.devices, search='extensive_search',
+                            organizationgroupid=7)
+
+
+def ids(records):
+    return sorted(record['DeviceId'] for record in records)
+
+
+def test_load_and_query(store):
+    assert len(store) == 10
+    assert ids(store.query(eq('Platform', 'Apple'))) == [1, 3, 5, 7, 9]
+    assert store.count(eq('LocationGroupId', 7)) == 10
+    assert ids(store.query(isin('Platform', ['Apple', 'Android']))) == list(range(10))
+    assert len(store.query(limit=3)) == 3
+
+
+def test_between_ranges(store):
+    assert store.ids(between('LastSeen', '2024-01-03T00:00:00', '2024-01-05T00:00:00')) == \
+        {2, 3, 4}
+    assert store.ids(between('LastSeen', high='2024-01-02T00:00:00')) == {0, 1}
+    assert store.ids(between('LastSeen', low='2024-01-09T00:00:00')) == {8, 9}
+    assert store.ids(between('LastSeen', '2025-01-01')) == set()
+    # Without a sorted index the records are scanned with the same result
+    assert store.ids(between('DeviceId', 2, 4)) == {2, 3, 4}
+
+
+def test_combined_filters(store):
+    recent = between('LastSeen', low='2024-01-06T00:00:00')
+    assert store.ids(all_of(eq('Platform', 'Apple'), recent)) == {5, 7, 9}
+    assert store.ids(eq('Platform', 'Apple') & recent) == {5, 7, 9}
+    assert store.ids(eq('DeviceId', 0) | eq('DeviceId', 2)) == {0, 2}
+    assert store.ids(any_of(eq('Platform', 'Windows'))) == set()
+
+
+def test_upsert_moves_indexed_fields(store):
+    record = dict(store.get(1), Platform='Android', LastSeen='2024-02-01T00:00:00')
+    store.upsert(record)
+    assert 1 not in store.ids(eq('Platform', 'Apple'))
+    assert 1 in store.ids(eq('Platform', 'Android'))
+    assert 1 not in store.ids(between('LastSeen', high='2024-01-31T00:00:00'))
+    assert store.ids(between('LastSeen', low='2024-02-01T00:00:00')) == {1}
+    assert len(store) == 10
+
+
+def test_extend_replaces_records(store):
+    store.extend([dict(store.get(3), Platform='Windows'),
+                  {'DeviceId': 10, 'Platform': 'Windows'}])
+    assert store.ids(eq('Platform', 'Windows')) == {3, 10}
+    assert 3 not in store.ids(eq('Platform', 'Apple'))
+    assert store.ids(between('LastSeen', '2024-01-04T00:00:00', '2024-01-04T00:00:00')) == {3}
+
+
+def test_remove_and_apply(store):
+    store.remove(2)
+    assert 2 not in store
+    assert store.ids(between('LastSeen', high='2024-01-03T00:00:00')) == {0, 1}
+    assert 2 not in store.ids(eq('Platform', 'Android'))
+    store.apply(DeviceEvent(REMOVED, 4, None))
+    store.apply(DeviceEvent('added', 11, {'DeviceId': 11, 'Platform': 'Apple'}))
+    assert store.ids(eq('Platform', 'Android')) == {0, 6, 8}
+    assert 11 in store.ids(eq('Platform', 'Apple'))
+    store.remove(99)
+    assert len(store) == 9
+
+
+def test_upsert_requires_device_id(store):
+    with pytest.raises(ValueError):
+        store.upsert({'Platform': 'Apple'})
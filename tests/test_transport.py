@@ -0,0 +1,96 @@
+import json
+import threading
+import time
+
+import pytest
+
+from pyws1uem.transport import (CassetteError, RecordTransport, ReplayTransport,
+                                request_key)
+
+from fakes import AUTH_URL, ENV, FakeTenant, make_client
+
+
+@pytest.fixture
+def cassette(tmp_path):
+    return str(tmp_path / 'session.ndjson')
+
+
+def record_session(cassette, devices=3):
+    tenant = FakeTenant([{'DeviceId': i, 'OrganizationGroupId': 7, 'Platform': 'Apple'}
+                         for i in range(devices)])
+    client = make_client(RecordTransport(cassette, transport=tenant))
+    response = client.devices.extensive_search(organizationgroupid=7, page=0, pagesize=500)
+    return tenant, response
+
+
+def test_request_key_matches_equal_requests():
+    key = request_key('get', ENV + '/api/mdm/devices', params={'page': 0})
+    assert key == request_key('GET', ENV + '/api/mdm/devices', params={'page': 0})
+    assert key != request_key('GET', ENV + '/api/mdm/devices', params={'page': 1})
+    assert request_key('POST', ENV, json_body={'a': 1, 'b': 2}) == \
+        request_key('POST', ENV, json_body={'b': 2, 'a': 1})
+    assert request_key('POST', ENV, json_body={'a': 1}) != \
+        request_key('POST', ENV, json_body={'a': 2})
+
+
+def test_replay_answers_recorded_requests(cassette):
+    tenant, recorded = record_session(cassette)
+    client = make_client(ReplayTransport(cassette))
+    replayed = client.devices.extensive_search(organizationgroupid=7, page=0, pagesize=500)
+    assert replayed == recorded
+    assert len(tenant.requests) == 2
+
+
+def test_replay_raises_for_unknown_requests(cassette):
+    record_session(cassette)
+    client = make_client(ReplayTransport(cassette))
+    with pytest.raises(CassetteError):
+        client.devices.extensive_search(organizationgroupid=8, page=0, pagesize=500)
+
+
+def test_record_redacts_secrets_and_tokens(cassette):
+    record_session(cassette)
+    with open(cassette, 'r', encoding='utf-8') as lines:
+        text = lines.read()
+    assert 'client-secret' not in text
+    assert 'secret-token' not in text
+    token = [json.loads(line) for line in text.splitlines()
+             if AUTH_URL in json.loads(line)['key']][0]
+    assert json.loads(token['content'])['access_token'] == 'recorded-access_token'
+
+
+def test_replay_latency(cassette):
+    record_session(cassette)
+    replay = ReplayTransport(cassette, latency=0.05)
+    key = next(key for key in replay.interactions if 'extensivesearch' in key)
+    method, url = key.split(' ')[:2]
+    started = time.perf_counter()
+    replay.request(method, url)
+    assert time.perf_counter() - started >= 0.05
+
+
+def test_replay_concurrency_limit(cassette):
+    record_session(cassette)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def latency(key):
+        with lock:
+            active.append(key)
+            peak.append(len(active))
+        time.sleep(0.02)
+        with lock:
+            active.pop()
+        return 0
+
+    replay = ReplayTransport(cassette, latency=latency, max_concurrency=2)
+    key = next(key for key in replay.interactions if 'extensivesearch' in key)
+    method, url = key.split(' ')[:2]
+    threads = [threading.Thread(target=replay.request, args=(method, url))
+               for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(peak) == 2
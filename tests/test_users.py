@@ -0,0 +1,22 @@
+from fakes import FakeTenant, make_client
+
+USERS = [{'Id': {'Value': 1}, 'UserName': 'jdoe', 'Email': 'jdoe@example.com'},
+         {'Id': {'Value': 2}, 'UserName': 'anna', 'Email': 'anna@example.com'}]
+
+
+def test_resolve_ids_reuses_passed_directory(monkeypatch):
+    client = make_client(FakeTenant())
+    loads = []
+
+    def iter_search(**kwargs):
+        loads.append(kwargs)
+        return iter(USERS)
+
+    monkeypatch.setattr(client.users, 'iter_search', iter_search)
+    directory = client.users.directory()
+    for _ in range(3):
+        assert client.users.resolve_ids(['JDOE', 'anna@example.com', 'nobody'],
+                                        directory=directory) == \
+            {'JDOE': 1, 'anna@example.com': 2}
+    assert len(loads) == 1
+    assert directory.loaded_at is not None
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from pyws1uem.mdm.watcher import ADDED, CHANGED, REMOVED, DeviceWatcher
+
+from fakes import FakeTenant, make_client
+
+NOW = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class FlakyTenant(FakeTenant):
+    """Tenant failing the status change window while fail is set."""
+
+    fail = False
+
+    def request(self, method, url, params=None, **kwargs):
+        if self.fail and 'statuschangestarttime' in (params or {}):
+            raise ConnectionError('window failed')
+        return super().request(method, url, params=params, **kwargs)
+
+
+def watch(devices):
+    tenant = FlakyTenant(devices)
+    return tenant, DeviceWatcher(make_client(tenant).devices, organizationgroupid=7)
+
+
+def fleet():
+    return [{'DeviceId': i, 'OrganizationGroupId': 7, 'Platform': 'Apple',
+             'Model': 'iPhone', 'EnrollmentStatus': 'Enrolled'} for i in range(3)]
+
+
+def kinds(events):
+    return sorted((event.kind, event.device_id) for event in events)
+
+
+def test_first_poll_reports_baseline():
+    _, watcher = watch(fleet())
+    assert kinds(watcher.poll(NOW)) == [(ADDED, 0), (ADDED, 1), (ADDED, 2)]
+    assert watcher.poll(NOW + timedelta(minutes=5)) == []
+
+
+def test_changes_and_removals():
+    tenant, watcher = watch(fleet())
+    watcher.poll(NOW)
+    tenant.devices[1]['Model'] = 'iPad'
+    tenant.devices[2]['EnrollmentStatus'] = 'Unenrolled'
+    assert kinds(watcher.poll(NOW + timedelta(minutes=5))) == [(CHANGED, 1), (REMOVED, 2)]
+    assert 2 not in watcher.fingerprints
+
+
+def test_failed_poll_reports_changes_on_retry():
+    tenant, watcher = watch(fleet())
+    watcher.poll(NOW)
+    tenant.devices[1]['Model'] = 'iPad'
+    tenant.fail = True
+    with pytest.raises(ConnectionError):
+        watcher.poll(NOW + timedelta(minutes=5))
+    assert watcher.last_poll == NOW
+    tenant.fail = False
+    assert kinds(watcher.poll(NOW + timedelta(minutes=10))) == [(CHANGED, 1)]